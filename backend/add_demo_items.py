@@ -5,7 +5,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from app.core.database import AsyncSessionLocal
-from app.models.models import User, Item, Image, Tag
+from app.models.models import User, Item, Image
+from app.services.tags import add_item_tags
 
 # Demo item data
 items_data = [
@@ -224,18 +225,7 @@ async def add_demo_items():
             session.add(image)
             
             # Add tags
-            for tag_name in item_data["tags"]:
-                # Check if tag exists
-                result = await session.execute(select(Tag).where(Tag.name == tag_name))
-                tag = result.scalar_one_or_none()
-                
-                if not tag:
-                    tag = Tag(name=tag_name)
-                    session.add(tag)
-                    await session.flush()
-                
-                # Add tag to item
-                item.tags.append(tag)
+            await add_item_tags(session, item.id, item_data["tags"])
             
             print(f"Created item: {item.title}")
         
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 
-from app.api.endpoints import auth, users, items, swaps, admin
+from app.api.endpoints import auth, users, items, swaps, admin, uploads
 
 # Main API router
 api_router = APIRouter()
@@ -11,3 +11,4 @@ api_router.include_router(users.router, prefix="/users", tags=["Users"])
 api_router.include_router(items.router, prefix="/items", tags=["Items"])
 api_router.include_router(swaps.router, prefix="/swaps", tags=["Swaps"])
 api_router.include_router(admin.router, prefix="/admin", tags=["Admin"])
+api_router.include_router(uploads.router, prefix="/uploads", tags=["Uploads"])
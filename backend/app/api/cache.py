@@ -0,0 +1,344 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import lru_cache, wraps
+from hashlib import blake2b
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Set
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.services.redis import redis_service
+
+# Versioned cache namespaces
+ITEM_LISTS = "item_lists"    # listing pages and facets
+
+# A rebuild holding the cross-worker lock longer than this is presumed dead
+REBUILD_LOCK_MS = 5000
+# How often workers that lost the lock look for the rebuilt entry
+REBUILD_POLL_SECONDS = 0.05
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema: Any) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def encode_response(schema: Any, payload: Any) -> bytes:
+    """
+    Validate `payload` against `schema` once and return the final JSON body.
+
+    The bytes are what FastAPI would have sent for a `response_model` of
+    `schema`, so they can be cached and served as-is.
+    """
+    adapter = _adapter(schema)
+    return adapter.dump_json(adapter.validate_python(payload))
+
+
+def json_response(body: bytes) -> Response:
+    """Serve an already encoded JSON body, bypassing response_model validation."""
+    return Response(content=body, media_type="application/json")
+
+
+class CachedBody(NamedTuple):
+    """
+    An encoded response body with the validators used for conditional GETs.
+
+    `fresh_until` is the soft expiry as a Unix timestamp; past it the entry
+    is still served while it is rebuilt in the background.
+    """
+    body: bytes
+    etag: str
+    last_modified: datetime
+    fresh_until: Optional[float] = None
+
+    @classmethod
+    def build(cls, body: bytes) -> "CachedBody":
+        """Wrap a freshly encoded body, deriving a strong ETag from its bytes."""
+        etag = '"' + blake2b(body, digest_size=16).hexdigest() + '"'
+        # HTTP dates have one second resolution
+        last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        return cls(body, etag, last_modified)
+
+    def is_stale(self) -> bool:
+        return self.fresh_until is not None and self.fresh_until <= time.time()
+
+    def pack(self) -> bytes:
+        """Serialize for the cache as a one-line JSON header followed by the body."""
+        header = json.dumps({
+            "etag": self.etag,
+            "last_modified": int(self.last_modified.timestamp()),
+            "fresh_until": self.fresh_until
+        }).encode()
+        return header + b"\n" + self.body
+
+    @classmethod
+    def unpack(cls, raw: Optional[bytes]) -> Optional["CachedBody"]:
+        """Inverse of `pack`; returns None for missing or unrecognised entries."""
+        if not raw:
+            return None
+        try:
+            header, body = raw.split(b"\n", 1)
+            meta = json.loads(header)
+            last_modified = datetime.fromtimestamp(meta["last_modified"], timezone.utc)
+            return cls(body, meta["etag"], last_modified, meta.get("fresh_until"))
+        except (ValueError, KeyError, TypeError):
+            return None
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # GET uses weak comparison, so a W/ prefix on the client's copy still matches
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def is_not_modified(request: Request, entry: CachedBody) -> bool:
+    """Evaluate If-None-Match, then If-Modified-Since, against a cached entry."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, entry.etag)
+    
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return entry.last_modified <= since
+    
+    return False
+
+
+def cached_response(request: Request, entry: CachedBody, private: bool = False) -> Response:
+    """
+    Serve a cached entry, answering 304 Not Modified when the client's copy
+    is still current. Clients are asked to revalidate on every use.
+    """
+    headers = {
+        "ETag": entry.etag,
+        "Last-Modified": format_datetime(entry.last_modified, usegmt=True),
+        "Cache-Control": "private, no-cache" if private else "no-cache",
+    }
+    if is_not_modified(request, entry):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+# Rebuilds currently running in this worker, by cache key
+_rebuilds: Dict[str, "asyncio.Future[CachedBody]"] = {}
+# Strong references to background refreshes so they are not collected mid-run
+_refreshes: Set[asyncio.Task] = set()
+
+Builder = Callable[[AsyncSession], Awaitable[CachedBody]]
+
+
+async def get_or_build(
+    key: str,
+    db: AsyncSession,
+    build: Builder,
+    expire_seconds: int = 300,
+    fresh_seconds: Optional[int] = None,
+) -> CachedBody:
+    """
+    Return the cached entry for `key`, building and storing it on a miss
+    with `build(db)`.
+
+    Misses are single-flight: within a worker, concurrent callers await the
+    one running build; across workers, a short Redis lock lets one worker
+    rebuild while the others poll the cache for its result. Exceptions
+    raised by `build`, such as a 404, reach every waiting caller.
+
+    With `fresh_seconds`, entries become stale after that long but are kept
+    until `expire_seconds`: a stale entry is returned immediately and
+    rebuilt in the background on a session of its own, so only a request
+    arriving after the hard expiry waits for the database.
+    """
+    entry = CachedBody.unpack(await redis_service.get_raw(key))
+    if entry:
+        if entry.is_stale() and key not in _rebuilds:
+            refresh = asyncio.create_task(_single_flight(
+                key, _claim(key), _refresh(key, db.bind, build, expire_seconds, fresh_seconds)
+            ))
+            _refreshes.add(refresh)
+            refresh.add_done_callback(_refreshes.discard)
+        return entry
+    
+    while key in _rebuilds:
+        rebuild = _rebuilds[key]
+        try:
+            return await asyncio.shield(rebuild)
+        except asyncio.CancelledError:
+            # Only retry when it was the rebuilding request that went away
+            if not rebuild.cancelled():
+                raise
+    
+    return await _single_flight(
+        key, _claim(key), _rebuild(key, db, build, expire_seconds, fresh_seconds)
+    )
+
+
+def _claim(key: str) -> "asyncio.Future[CachedBody]":
+    # Registered synchronously so no other caller can start the same rebuild
+    rebuild = asyncio.get_running_loop().create_future()
+    # Mark the outcome as retrieved even if nobody else was waiting
+    rebuild.add_done_callback(lambda future: future.cancelled() or future.exception())
+    _rebuilds[key] = rebuild
+    return rebuild
+
+
+async def _single_flight(
+    key: str,
+    rebuild: "asyncio.Future[CachedBody]",
+    rebuild_entry: Awaitable[Optional[CachedBody]],
+) -> Optional[CachedBody]:
+    try:
+        entry = await rebuild_entry
+    except asyncio.CancelledError:
+        rebuild.cancel()
+        raise
+    except Exception as e:
+        rebuild.set_exception(e)
+        raise
+    else:
+        if entry is None:
+            rebuild.cancel()
+        else:
+            rebuild.set_result(entry)
+        return entry
+    finally:
+        del _rebuilds[key]
+
+
+def _with_freshness(entry: CachedBody, fresh_seconds: Optional[int]) -> CachedBody:
+    if fresh_seconds is None:
+        return entry
+    return entry._replace(fresh_until=time.time() + fresh_seconds)
+
+
+async def _store(
+    key: str,
+    entry: CachedBody,
+    expire_seconds: int,
+    fresh_seconds: Optional[int],
+) -> CachedBody:
+    entry = _with_freshness(entry, fresh_seconds)
+    await redis_service.set_raw(key, entry.pack(), expire_seconds=expire_seconds)
+    return entry
+
+
+async def get_many(keys: List[str]) -> List[Optional[CachedBody]]:
+    """Look up several entries with one MGET; stale entries count as misses."""
+    entries = [CachedBody.unpack(raw) for raw in await redis_service.get_many_raw(keys)]
+    return [entry if entry and not entry.is_stale() else None for entry in entries]
+
+
+async def store_many(
+    entries: Dict[str, CachedBody],
+    expire_seconds: int = 300,
+    fresh_seconds: Optional[int] = None,
+) -> None:
+    """Store several entries, as `get_or_build` would, in one pipelined round trip."""
+    await redis_service.set_many_raw(
+        {key: _with_freshness(entry, fresh_seconds).pack() for key, entry in entries.items()},
+        expire_seconds=expire_seconds,
+    )
+
+
+async def _rebuild(
+    key: str,
+    db: AsyncSession,
+    build: Builder,
+    expire_seconds: int,
+    fresh_seconds: Optional[int],
+) -> CachedBody:
+    token = await redis_service.acquire_lock(key, REBUILD_LOCK_MS)
+    
+    waited = 0.0
+    while token is None and waited < REBUILD_LOCK_MS / 1000:
+        await asyncio.sleep(REBUILD_POLL_SECONDS)
+        waited += REBUILD_POLL_SECONDS
+        entry = CachedBody.unpack(await redis_service.get_raw(key))
+        if entry:
+            return entry
+        token = await redis_service.acquire_lock(key, REBUILD_LOCK_MS)
+    
+    try:
+        return await _store(key, await build(db), expire_seconds, fresh_seconds)
+    finally:
+        if token is not None:
+            await redis_service.release_lock(key, token)
+
+
+async def _refresh(
+    key: str,
+    bind: Any,
+    build: Builder,
+    expire_seconds: int,
+    fresh_seconds: Optional[int],
+) -> Optional[CachedBody]:
+    try:
+        # Another worker may have refreshed already; look past our local copy
+        entry = CachedBody.unpack(await redis_service.get_raw(key, use_local=False))
+        if entry and not entry.is_stale():
+            return entry
+        
+        token = await redis_service.acquire_lock(key, REBUILD_LOCK_MS)
+        if token is None:
+            # Another worker is refreshing it
+            return None
+        try:
+            # The request that noticed the stale entry may have closed its
+            # session by now
+            async with AsyncSession(bind, expire_on_commit=False) as db:
+                return await _store(key, await build(db), expire_seconds, fresh_seconds)
+        finally:
+            await redis_service.release_lock(key, token)
+    except Exception as e:
+        # Nobody awaits a refresh; the stale entry keeps being served
+        print(f"Cache refresh error for {key}: {e}")
+        return None
+
+
+class NamespaceKeys:
+    """Builds cache keys inside the current generation of a namespace."""
+
+    def __init__(self, namespace: str, version: int):
+        self.namespace = namespace
+        self.version = version
+
+    def __call__(self, key: str) -> str:
+        return f"{self.namespace}:v{self.version}:{key}"
+
+
+def reads(namespace: str):
+    """
+    Declare that an endpoint caches entries in `namespace`.
+
+    Use as `keys: NamespaceKeys = Depends(reads(ITEM_LISTS))` and build cache
+    keys with `keys(...)`.
+    """
+    async def dependency() -> NamespaceKeys:
+        return NamespaceKeys(namespace, await redis_service.namespace_version(namespace))
+    return dependency
+
+
+def invalidates(*namespaces: str):
+    """
+    Declare the namespaces an endpoint writes to. They are invalidated, one
+    pipelined INCR each, after the endpoint returns successfully.
+    """
+    def decorator(endpoint):
+        @wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            result = await endpoint(*args, **kwargs)
+            await redis_service.invalidate_namespaces(namespaces)
+            return result
+        return wrapper
+    return decorator
@@ -2,12 +2,15 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
-from typing import List
+from typing import Any, Dict, List
 
+from app.api.cache import ITEM_LISTS, invalidates
 from app.api.deps import get_admin_user
-from app.core.database import get_db
-from app.models.models import Item, User
+from app.api.jobs import enqueue_image_collection
+from app.core.database import get_db, get_dialect_name
+from app.models.models import Item, User, ITEM_IS_PENDING_APPROVAL
 from app.schemas.schemas import Item as ItemSchema
+from app.services.items import fetch_items, fetch_items_by_ids, select_items
 from app.services.redis import redis_service
 
 router = APIRouter()
@@ -22,43 +25,18 @@ async def get_pending_items(
     """
     Get items pending approval.
     """
-    # Query items
-    result = await db.execute(
-        select(Item)
-        .options(selectinload(Item.images), selectinload(Item.user))
-        .where(Item.is_approved == False)
+    # Query items with their owners
+    query = (
+        select_items(get_dialect_name(db), with_user=True)
+        .where(ITEM_IS_PENDING_APPROVAL)
         .order_by(Item.created_at.desc())
         .offset(skip)
         .limit(limit)
     )
-    items = result.scalars().all()
-    
-    # Convert items to proper format to avoid serialization issues
-    formatted_items = []
-    for item in items:
-        item_dict = {
-            'id': item.id,
-            'title': item.title,
-            'description': item.description,
-            'category': item.category,
-            'type': item.type,
-            'size': item.size,
-            'condition': item.condition,
-            'point_value': item.point_value,
-            'user_id': item.user_id,
-            'status': item.status,
-            'is_approved': item.is_approved,
-            'created_at': item.created_at,
-            'updated_at': item.updated_at,
-            'images': item.images,
-            'tags': [tag.name for tag in item.tags] if hasattr(item, 'tags') and item.tags else [],
-            'user': item.user
-        }
-        formatted_items.append(item_dict)
-    
-    return formatted_items
+    return await fetch_items(db, query)
 
 @router.put("/items/{item_id}/approve", response_model=ItemSchema)
+@invalidates(ITEM_LISTS)
 async def approve_item(
     item_id: int,
     db: AsyncSession = Depends(get_db),
@@ -69,9 +47,7 @@ async def approve_item(
     """
     # Query item
     result = await db.execute(
-        select(Item)
-        .options(selectinload(Item.images))
-        .where(Item.id == item_id)
+        select(Item).where(Item.id == item_id)
     )
     item = result.scalar_one_or_none()
     
@@ -87,35 +63,15 @@ async def approve_item(
         item.status = "available"
     
     await db.commit()
-    await db.refresh(item)
     
     # Clear cache
-    redis_service.delete(f"items:{item_id}")
-    redis_service.clear_pattern("items:all:*")
+    await redis_service.delete(f"items:{item_id}")
     
-    # Convert item to proper format to avoid serialization issues
-    item_dict = {
-        'id': item.id,
-        'title': item.title,
-        'description': item.description,
-        'category': item.category,
-        'type': item.type,
-        'size': item.size,
-        'condition': item.condition,
-        'point_value': item.point_value,
-        'user_id': item.user_id,
-        'status': item.status,
-        'is_approved': item.is_approved,
-        'created_at': item.created_at,
-        'updated_at': item.updated_at,
-        'images': item.images,
-        'tags': [tag.name for tag in item.tags] if hasattr(item, 'tags') and item.tags else [],
-        'user': None
-    }
-    
-    return item_dict
+    items_by_id = await fetch_items_by_ids(db, [item_id])
+    return items_by_id[item_id]
 
 @router.put("/items/{item_id}/reject", status_code=status.HTTP_204_NO_CONTENT)
+@invalidates(ITEM_LISTS)
 async def reject_item(
     item_id: int,
     db: AsyncSession = Depends(get_db),
@@ -138,12 +94,22 @@ async def reject_item(
             detail="Item not found",
         )
     
-    # Delete item
+    # Delete item; its image files are removed afterwards
+    enqueue_image_collection(db, item.images)
     await db.delete(item)
     await db.commit()
     
     # Clear cache
-    redis_service.delete(f"items:{item_id}")
-    redis_service.clear_pattern("items:all:*")
+    await redis_service.delete(f"items:{item_id}")
     
     return None
+
+
+@router.get("/cache/stats")
+async def get_cache_stats(
+    current_user: User = Depends(get_admin_user),
+) -> Dict[str, Any]:
+    """
+    Get hit ratio and memory use of this worker's in-process cache tier.
+    """
+    return redis_service.stats()
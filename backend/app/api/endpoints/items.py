@@ -1,33 +1,62 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status, UploadFile, File, Form
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, literal, literal_column, type_coerce, union_all, String
 from sqlalchemy.orm import selectinload
-from typing import List, Optional
+from typing import Any, List, Optional
+from datetime import datetime
+import base64
 import json
 
+from app.api.cache import (
+    ITEM_LISTS,
+    CachedBody,
+    NamespaceKeys,
+    cached_response,
+    encode_response,
+    get_many,
+    get_or_build,
+    invalidates,
+    store_many,
+    reads,
+)
 from app.api.deps import get_current_active_user, get_admin_user
-from app.core.database import get_db
-from app.models.models import Item, User, Image, Tag, item_tag
+from app.api.jobs import DERIVE_ITEM_VARIANTS, enqueue_image_collection
+from app.core.database import get_db, get_dialect_name
+from app.models.models import Item, User, Image, Tag, item_tag, ITEM_IS_LISTED
 from app.schemas.schemas import (
     Item as ItemSchema, 
+    ItemPage,
     ItemCreate, 
     ItemUpdate, 
     ImageCreate,
     TagCreate
 )
 from app.services.redis import redis_service
+from app.services.items import fetch_items_by_ids, row_to_item, select_items
+from app.services.jobs import enqueue
+from app.services.search import apply_search
+from app.services.tags import add_item_tags, replace_item_tags
+from app.services.s3 import storage
+from app.services.uploads import save_uploads, verify_uploaded_keys
 
 router = APIRouter()
 
+# Upper bound on the IDs accepted by GET /batch
+MAX_BATCH_ITEMS = 100
+
 @router.post("", response_model=ItemSchema)
+@invalidates(ITEM_LISTS)
 async def create_item(
     item_in: str = Form(...),  # JSON string of item data
-    images: List[UploadFile] = File(...),
+    images: List[UploadFile] = File(None),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ) -> ItemSchema:
     """
     Create new item.
+
+    Images are either sent as files, or uploaded straight to storage
+    beforehand (see POST /api/uploads) and listed in `image_keys`.
     """
     # Parse item data
     try:
@@ -39,6 +68,14 @@ async def create_item(
             detail=f"Invalid item data: {str(e)}",
         )
     
+    images = images or []
+    if not images and not item_create.image_keys:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="At least one image is required",
+        )
+    image_keys = await verify_uploaded_keys(item_create.image_keys or [])
+    
     # Create item
     db_item = Item(
         title=item_create.title,
@@ -58,129 +95,50 @@ async def create_item(
     
     # Process tags
     if item_create.tags:
-        for tag_name in item_create.tags:
-            # Check if tag exists
-            result = await db.execute(select(Tag).where(Tag.name == tag_name))
-            tag = result.scalar_one_or_none()
-            
-            # Create tag if it doesn't exist
-            if not tag:
-                tag = Tag(name=tag_name)
-                db.add(tag)
-                await db.flush()
-            
-            # Add tag to item using direct insertion into junction table
-            await db.execute(
-                item_tag.insert().values(item_id=db_item.id, tag_id=tag.id)
-            )
-    
-    # Upload images
-    import os
-    import uuid
-    from fastapi import Request
-    STATIC_IMAGE_PATH = os.path.join(os.path.dirname(__file__), '../../static/images')
-    os.makedirs(STATIC_IMAGE_PATH, exist_ok=True)
-    for i, image in enumerate(images):
-        try:
-            # Save image to local static directory
-            ext = os.path.splitext(image.filename)[1]
-            unique_filename = f"{uuid.uuid4().hex}{ext}"
-            file_path = os.path.join(STATIC_IMAGE_PATH, unique_filename)
-            with open(file_path, "wb") as buffer:
-                buffer.write(await image.read())
-            image_url = f"/static/images/{unique_filename}"
-        except Exception as e:
-            print(f"Local image save failed: {e}")
-            image_url = f"/static/images/placeholder.png"
-        
+        await add_item_tags(db, db_item.id, item_create.tags)
+    
+    # Upload images, stored once per distinct content
+    stored = await save_uploads(images)
+    image_urls = [
+        (storage.url(upload.filename), upload.storage_key) if upload
+        else ("/static/images/placeholder.png", None)
+        for upload in stored
+    ]
+    image_urls += [(storage.url(key), key.split(".")[0]) for key in image_keys]
+    for i, (image_url, storage_key) in enumerate(image_urls):
         # Create image in database
         db_image = Image(
             image_url=image_url,
             is_primary=(i == 0),  # First image is primary
-            item_id=db_item.id
+            item_id=db_item.id,
+            storage_key=storage_key
         )
         db.add(db_image)
     
+    # Resized copies are rendered after the response; until then clients
+    # fall back to image_url
+    if any(stored) or image_keys:
+        enqueue(db, DERIVE_ITEM_VARIANTS, {"item_id": db_item.id})
+    
     await db.commit()
-    # Refresh the item and its images from the database
-    await db.refresh(db_item)
-    result = await db.execute(
-        select(Item)
-        .options(selectinload(Item.images), selectinload(Item.tags))
-        .where(Item.id == db_item.id)
-    )
-    db_item = result.scalar_one_or_none()
-    
-    # Convert tags to strings to match schema expectation
-    if db_item and hasattr(db_item, 'tags'):
-        # Convert images to dictionaries
-        images_list = []
-        if db_item.images:
-            for image in db_item.images:
-                images_list.append({
-                    'id': image.id,
-                    'image_url': image.image_url,
-                    'is_primary': image.is_primary,
-                    'item_id': image.item_id,
-                    'created_at': image.created_at
-                })
-        
-        # Create a copy of the item with tags as strings
-        item_dict = {
-            'id': db_item.id,
-            'title': db_item.title,
-            'description': db_item.description,
-            'category': db_item.category,
-            'type': db_item.type,
-            'size': db_item.size,
-            'condition': db_item.condition,
-            'point_value': db_item.point_value,
-            'user_id': db_item.user_id,
-            'status': db_item.status,
-            'is_approved': db_item.is_approved,
-            'created_at': db_item.created_at,
-            'updated_at': db_item.updated_at,
-            'images': images_list,
-            'tags': [tag.name for tag in db_item.tags] if db_item.tags else [],
-            'user': None  # We'll load this separately if needed
-        }
-        db_item = item_dict
     
-    # Clear cache for items
-    redis_service.clear_pattern("items:*")
+    # Load the item card back from the database
+    items_by_id = await fetch_items_by_ids(db, [db_item.id])
+    db_item = items_by_id[db_item.id]
     
     return db_item
 
-@router.get("", response_model=dict)
-async def get_items(
-    skip: int = 0,
-    limit: int = 100,
+def _apply_item_filters(
+    query,
+    dialect_name: str,
     category: Optional[str] = None,
     condition: Optional[str] = None,
     size: Optional[str] = None,
     search: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
-) -> dict:
-    """
-    Get all items with filtering.
-    """
-    # Try to get from cache
-    cache_key = f"items:all:{skip}:{limit}:{category}:{condition}:{size}:{search}"
-    cached_items = redis_service.get(cache_key)
-    if cached_items:
-        return cached_items
-    
-    # Build query
-    query = (
-        select(Item)
-        .where(Item.is_approved == True, Item.status == "available")
-        .options(selectinload(Item.images), selectinload(Item.tags))
-        .order_by(Item.created_at.desc())
-        .offset(skip)
-        .limit(limit)
-    )
-    
-    # Apply filters
+    rank: bool = False,
+):
+    """Apply the public browse filters shared by the listing and count queries."""
+    query = query.where(ITEM_IS_LISTED)
     if category:
         query = query.where(Item.category == category)
     if condition:
@@ -188,96 +146,261 @@ async def get_items(
     if size:
         query = query.where(Item.size == size)
     if search:
-        search_term = f"%{search}%"
+        query = apply_search(query, dialect_name, search, rank=rank)
+    return query
+
+def _cursor_column(dialect_name: str):
+    """
+    Column used as the created_at half of the keyset.
+
+    SQLite stores timestamps as text in more than one format (with and without
+    microseconds), so the cursor carries the raw stored text and is compared as
+    text, which is exactly how SQLite orders the column.
+    """
+    if dialect_name == "sqlite":
+        return type_coerce(Item.created_at, String).label("cursor_created_at")
+    return Item.created_at.label("cursor_created_at")
+
+def _encode_cursor(created_at: Any, item_id: int) -> str:
+    """Encode the (created_at, id) position of the last row into an opaque cursor."""
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    raw = json.dumps([created_at, item_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def _decode_cursor(cursor: str, dialect_name: str):
+    """Decode a cursor produced by `_encode_cursor` into bindable keyset values."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, item_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if dialect_name == "sqlite":
+            created_at_value = literal(str(created_at), String)
+        else:
+            created_at_value = datetime.fromisoformat(created_at)
+        return created_at_value, int(item_id)
+    except Exception:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+
+async def _build_item_page(
+    db: AsyncSession,
+    skip: int,
+    limit: int,
+    category: Optional[str],
+    condition: Optional[str],
+    size: Optional[str],
+    search: Optional[str],
+    cursor: Optional[str],
+    include_total: bool,
+    sort: str,
+) -> CachedBody:
+    dialect_name = get_dialect_name(db)
+    cursor_column = _cursor_column(dialect_name)
+    
+    # Relevance order has no keyset, so ranked pages are offset-only
+    rank = bool(search) and sort == "relevance" and not cursor
+    # A window count sees every filtered row before LIMIT/OFFSET, but a cursor
+    # predicate would narrow it to the remaining rows only
+    window_total = include_total and not cursor
+    
+    query = select_items(dialect_name).add_columns(cursor_column)
+    if window_total:
+        query = query.add_columns(func.count().over().label("total_count"))
+    
+    # Fetch one extra row to know whether another page exists
+    query = query.limit(limit + 1)
+    query = _apply_item_filters(query, dialect_name, category, condition, size, search, rank=rank)
+    query = query.order_by(Item.created_at.desc(), Item.id.desc())
+    
+    if cursor:
+        cursor_created_at, cursor_id = _decode_cursor(cursor, dialect_name)
+        created_at_key = type_coerce(Item.created_at, String) if dialect_name == "sqlite" else Item.created_at
         query = query.where(
-            (Item.title.ilike(search_term)) | 
-            (Item.description.ilike(search_term))
+            (created_at_key < cursor_created_at) |
+            ((created_at_key == cursor_created_at) & (Item.id < cursor_id))
         )
+    else:
+        query = query.offset(skip)
     
     # Execute query
     result = await db.execute(query)
-    items = result.scalars().all()
-    
-    # Convert items to proper format to avoid serialization issues
-    formatted_items = []
-    for item in items:
-        # Convert images to dictionaries
-        images_list = []
-        if item.images:
-            for image in item.images:
-                images_list.append({
-                    'id': image.id,
-                    'image_url': image.image_url,
-                    'is_primary': image.is_primary,
-                    'item_id': image.item_id,
-                    'created_at': image.created_at
-                })
-        
-        item_dict = {
-            'id': item.id,
-            'title': item.title,
-            'description': item.description,
-            'category': item.category,
-            'type': item.type,
-            'size': item.size,
-            'condition': item.condition,
-            'point_value': item.point_value,
-            'user_id': item.user_id,
-            'status': item.status,
-            'is_approved': item.is_approved,
-            'created_at': item.created_at,
-            'updated_at': item.updated_at,
-            'images': images_list,
-            'tags': [tag.name for tag in item.tags] if item.tags else [],
-            'user': None
-        }
-        formatted_items.append(item_dict)
+    rows = result.all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
     
-    # Get total count for pagination
-    count_query = select(func.count(Item.id)).where(Item.is_approved == True, Item.status == "available")
+    next_cursor = None
+    if has_more and rows and not rank:
+        next_cursor = _encode_cursor(rows[-1].cursor_created_at, rows[-1].id)
     
-    # Apply filters
-    if category:
-        count_query = count_query.where(Item.category == category)
-    if condition:
-        count_query = count_query.where(Item.condition == condition)
-    if size:
-        count_query = count_query.where(Item.size == size)
-    if search:
-        search_term = f"%{search}%"
-        count_query = count_query.where(
-            (Item.title.ilike(search_term)) | 
-            (Item.description.ilike(search_term))
-        )
+    formatted_items = [row_to_item(row) for row in rows]
     
-    count_result = await db.execute(count_query)
-    total_count = count_result.scalar_one_or_none() or 0
+    # Get total count for pagination
+    total_count = None
+    if window_total and rows:
+        total_count = rows[0].total_count
+    elif include_total:
+        # Cursor pages, or an offset past the last row, need a separate count
+        count_query = _apply_item_filters(
+            select(func.count(Item.id)).select_from(Item), dialect_name, category, condition, size, search
+        )
+        count_result = await db.execute(count_query)
+        total_count = count_result.scalar_one_or_none() or 0
     
     response = {
         "items": formatted_items,
-        "total": total_count
+        "total": total_count,
+        "next_cursor": next_cursor
     }
     
-    # Cache results
-    redis_service.set(cache_key, response, expire_seconds=300)  # 5 minutes
+    # Validate and encode once; cache hits are served as these exact bytes
+    return CachedBody.build(encode_response(ItemPage, response))
+
+@router.get("", response_model=ItemPage)
+async def get_items(
+    request: Request,
+    skip: int = 0,
+    limit: int = 100,
+    category: Optional[str] = None,
+    condition: Optional[str] = None,
+    size: Optional[str] = None,
+    search: Optional[str] = None,
+    cursor: Optional[str] = None,
+    include_total: Optional[bool] = None,
+    sort: Optional[str] = None,
+    keys: NamespaceKeys = Depends(reads(ITEM_LISTS)),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """
+    Get all items with filtering.
+
+    Pages are ordered newest first. Pass the returned `next_cursor` back as
+    `cursor` to fetch the following page at constant cost; `skip` is ignored
+    when a cursor is given but keeps working for offset-based clients.
     
-    return response
+    A search is ordered by relevance (`sort=relevance`, the default), which
+    supports offset paging only, so those pages carry no cursor. Pass
+    `sort=newest` to page through search results with cursors instead.
+
+    `total` is computed in the same statement as the page. It is left out
+    (null) for cursor pages unless `include_total=true`, and
+    `include_total=false` skips counting altogether.
+    """
+    if sort is None:
+        sort = "relevance" if search else "newest"
+    if sort not in ("newest", "relevance"):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="sort must be newest or relevance",
+        )
+    if include_total is None:
+        include_total = cursor is None
+    
+    cache_key = keys(f"{skip}:{limit}:{category}:{condition}:{size}:{search}:{cursor}:{include_total}:{sort}")
+    entry = await get_or_build(
+        cache_key,
+        db,
+        lambda session: _build_item_page(
+            session, skip, limit, category, condition, size, search, cursor, include_total, sort
+        ),
+        fresh_seconds=300,  # 5 minutes, then served stale while refreshing
+        expire_seconds=3600
+    )
+    return cached_response(request, entry)
+
+async def _build_item_facets(
+    db: AsyncSession,
+    category: Optional[str],
+    condition: Optional[str],
+    size: Optional[str],
+    search: Optional[str],
+) -> CachedBody:
+    dialect_name = get_dialect_name(db)
+    filtered = _apply_item_filters(
+        select(Item.id, Item.category, Item.condition, Item.size).select_from(Item),
+        dialect_name, category, condition, size, search
+    ).cte("filtered_items")
+    
+    facet_queries = [
+        select(
+            literal_column(f"'{facet}'").label("facet"),
+            filtered.c[facet].label("value"),
+            func.count().label("count")
+        ).group_by(filtered.c[facet])
+        for facet in ("category", "condition", "size")
+    ]
+    facet_queries.append(
+        select(
+            literal_column("'tag'").label("facet"),
+            Tag.name.label("value"),
+            func.count().label("count")
+        )
+        .select_from(filtered)
+        .join(item_tag, item_tag.c.item_id == filtered.c.id)
+        .join(Tag, Tag.id == item_tag.c.tag_id)
+        .group_by(Tag.name)
+    )
+    
+    result = await db.execute(union_all(*facet_queries))
+    
+    facets = {"category": {}, "condition": {}, "size": {}, "tag": {}}
+    for facet, value, count in result:
+        facets[facet][value] = count
+    
+    response = {
+        "facets": facets,
+        # Every filtered item has exactly one category
+        "total": sum(facets["category"].values())
+    }
+    
+    return CachedBody.build(encode_response(dict, response))
+
+@router.get("/facets", response_model=dict)
+async def get_item_facets(
+    request: Request,
+    category: Optional[str] = None,
+    condition: Optional[str] = None,
+    size: Optional[str] = None,
+    search: Optional[str] = None,
+    keys: NamespaceKeys = Depends(reads(ITEM_LISTS)),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """
+    Get item counts per category, condition, size and tag for the browse sidebar.
+
+    Applies the same filters as `get_items` and computes every facet in a
+    single grouped query.
+    """
+    # Stored next to the listing pages so the same invalidations clear it
+    cache_key = keys(f"facets:{category}:{condition}:{size}:{search}")
+    entry = await get_or_build(
+        cache_key,
+        db,
+        lambda session: _build_item_facets(session, category, condition, size, search),
+        fresh_seconds=300,  # 5 minutes, then served stale while refreshing
+        expire_seconds=3600
+    )
+    return cached_response(request, entry)
 
 @router.get("/my-items", response_model=dict)
 async def get_my_items(
     skip: int = 0,
     limit: int = 100,
+    include_total: bool = True,
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
 ) -> dict:
     """
     Get current user's items (including pending and unapproved).
     """
-    # Build query for user's items
+    # Build query for user's items, counting them in the same statement
+    query = select_items(get_dialect_name(db))
+    if include_total:
+        query = query.add_columns(func.count().over().label("total_count"))
     query = (
-        select(Item)
+        query
         .where(Item.user_id == current_user.id)
-        .options(selectinload(Item.images), selectinload(Item.tags))
         .order_by(Item.created_at.desc())
         .offset(skip)
         .limit(limit)
@@ -285,47 +408,19 @@ async def get_my_items(
     
     # Execute query
     result = await db.execute(query)
-    items = result.scalars().all()
+    rows = result.all()
     
     # Get total count
-    count_query = select(func.count(Item.id)).where(Item.user_id == current_user.id)
-    count_result = await db.execute(count_query)
-    total_count = count_result.scalar_one_or_none() or 0
-    
-    # Convert items to proper format
-    formatted_items = []
-    for item in items:
-        # Convert images to dictionaries
-        images_list = []
-        if item.images:
-            for image in item.images:
-                images_list.append({
-                    'id': image.id,
-                    'image_url': image.image_url,
-                    'is_primary': image.is_primary,
-                    'item_id': image.item_id,
-                    'created_at': image.created_at
-                })
-        
-        item_dict = {
-            'id': item.id,
-            'title': item.title,
-            'description': item.description,
-            'category': item.category,
-            'type': item.type,
-            'size': item.size,
-            'condition': item.condition,
-            'point_value': item.point_value,
-            'user_id': item.user_id,
-            'status': item.status,
-            'is_approved': item.is_approved,
-            'created_at': item.created_at,
-            'updated_at': item.updated_at,
-            'images': images_list,
-            'tags': [tag.name for tag in item.tags] if item.tags else [],
-            'user': None
-        }
-        formatted_items.append(item_dict)
+    total_count = None
+    if include_total and rows:
+        total_count = rows[0].total_count
+    elif include_total:
+        # Offset past the last row
+        count_query = select(func.count(Item.id)).where(Item.user_id == current_user.id)
+        count_result = await db.execute(count_query)
+        total_count = count_result.scalar_one_or_none() or 0
+    
+    formatted_items = [row_to_item(row) for row in rows]
     
     response = {
         "items": formatted_items,
@@ -334,93 +429,89 @@ async def get_my_items(
     
     return response
 
-@router.get("/{item_id}", response_model=ItemSchema)
-async def get_item(
-    item_id: int,
-    db: AsyncSession = Depends(get_db),
-) -> ItemSchema:
-    """
-    Get item by ID.
-    """
-    # Try to get from cache
-    cache_key = f"items:{item_id}"
-    cached_item = redis_service.get(cache_key)
-    if cached_item:
-        return cached_item
-    
-    # Query item with relationships
-    result = await db.execute(
-        select(Item)
-        .options(selectinload(Item.images), selectinload(Item.tags), selectinload(Item.user))
-        .where(Item.id == item_id)
-    )
-    item = result.scalar_one_or_none()
+async def _build_item_detail(db: AsyncSession, item_id: int) -> CachedBody:
+    # Query item with its owner
+    items_by_id = await fetch_items_by_ids(db, [item_id], with_user=True)
+    item_dict = items_by_id.get(item_id)
     
-    if not item:
+    # For public access, only show approved items
+    if not item_dict or not item_dict['is_approved']:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Item not found",
         )
     
-    # For public access, only show approved items
-    if not item.is_approved:
+    # Validate and encode once; cache hits are served as these exact bytes
+    return CachedBody.build(encode_response(ItemSchema, item_dict))
+
+@router.get("/batch", response_model=List[ItemSchema])
+async def get_items_batch(
+    request: Request,
+    ids: str = Query(..., description="Comma-separated item IDs"),
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """
+    Get several items by ID, in the order given.
+
+    Reads every cached item in one MGET, loads the rest in one query and
+    caches them in one pipelined write. Unknown and unapproved items are
+    left out rather than failing the whole batch.
+    """
+    try:
+        item_ids = list(dict.fromkeys(int(item_id) for item_id in ids.split(",") if item_id.strip()))
+    except ValueError:
         raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Item not found",
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be a comma-separated list of integers",
+        )
+    if len(item_ids) > MAX_BATCH_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {MAX_BATCH_ITEMS} items can be fetched at once",
         )
     
-    # Convert item to proper format to avoid serialization issues
-    # Convert images to dictionaries
-    images_list = []
-    if item.images:
-        for image in item.images:
-            images_list.append({
-                'id': image.id,
-                'image_url': image.image_url,
-                'is_primary': image.is_primary,
-                'item_id': image.item_id,
-                'created_at': image.created_at
-            })
-    
-    # Convert user to dictionary
-    user_dict = None
-    if item.user:
-        user_dict = {
-            'id': item.user.id,
-            'email': item.user.email,
-            'username': item.user.username,
-            'profile_picture': item.user.profile_picture,
-            'points_balance': item.user.points_balance,
-            'role': item.user.role,
-            'created_at': item.user.created_at,
-            'updated_at': item.user.updated_at
-        }
-    
-    item_dict = {
-        'id': item.id,
-        'title': item.title,
-        'description': item.description,
-        'category': item.category,
-        'type': item.type,
-        'size': item.size,
-        'condition': item.condition,
-        'point_value': item.point_value,
-        'user_id': item.user_id,
-        'status': item.status,
-        'is_approved': item.is_approved,
-        'created_at': item.created_at,
-        'updated_at': item.updated_at,
-        'images': images_list,
-        'tags': [tag.name for tag in item.tags] if item.tags else [],
-        'user': user_dict
-    }
+    entries = dict(zip(item_ids, await get_many([f"items:{item_id}" for item_id in item_ids])))
     
-    # Cache the converted item
-    redis_service.set(cache_key, item_dict, expire_seconds=300)  # 5 minutes
+    missing_ids = [item_id for item_id, entry in entries.items() if entry is None]
+    if missing_ids:
+        items_by_id = await fetch_items_by_ids(db, missing_ids, with_user=True)
+        loaded = {
+            item_id: CachedBody.build(encode_response(ItemSchema, item_dict))
+            for item_id, item_dict in items_by_id.items()
+            # For public access, only show approved items
+            if item_dict['is_approved']
+        }
+        entries.update(loaded)
+        await store_many(
+            {f"items:{item_id}": entry for item_id, entry in loaded.items()},
+            fresh_seconds=300,  # same lifetimes as get_item
+            expire_seconds=3600
+        )
     
-    return item_dict
+    # Every entry body is already an encoded item, so the list is a join
+    body = b"[" + b",".join(entry.body for entry in entries.values() if entry) + b"]"
+    return cached_response(request, CachedBody.build(body))
+
+@router.get("/{item_id}", response_model=ItemSchema)
+async def get_item(
+    item_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+) -> Response:
+    """
+    Get item by ID.
+    """
+    entry = await get_or_build(
+        f"items:{item_id}",
+        db,
+        lambda session: _build_item_detail(session, item_id),
+        fresh_seconds=300,  # 5 minutes, then served stale while refreshing
+        expire_seconds=3600
+    )
+    return cached_response(request, entry)
 
 @router.put("/{item_id}", response_model=ItemSchema)
+@invalidates(ITEM_LISTS)
 async def update_item(
     item_id: int,
     item_update: ItemUpdate,
@@ -465,23 +556,7 @@ async def update_item(
     
     # Update tags if provided
     if item_update.tags is not None:
-        # Clear existing tags
-        item.tags = []
-        
-        # Add new tags
-        for tag_name in item_update.tags:
-            # Check if tag exists
-            result = await db.execute(select(Tag).where(Tag.name == tag_name))
-            tag = result.scalar_one_or_none()
-            
-            # Create tag if it doesn't exist
-            if not tag:
-                tag = Tag(name=tag_name)
-                db.add(tag)
-                await db.flush()
-            
-            # Add tag to item
-            item.tags.append(tag)
+        await replace_item_tags(db, item_id, item_update.tags)
     
     # If user updates item, mark as not approved
     if current_user.role != "admin":
@@ -489,15 +564,15 @@ async def update_item(
         item.status = "pending"
     
     await db.commit()
-    await db.refresh(item)
     
     # Clear cache
-    redis_service.delete(f"items:{item_id}")
-    redis_service.clear_pattern("items:all:*")
+    await redis_service.delete(f"items:{item_id}")
     
-    return item
+    items_by_id = await fetch_items_by_ids(db, [item_id])
+    return items_by_id[item_id]
 
 @router.delete("/{item_id}", status_code=status.HTTP_204_NO_CONTENT)
+@invalidates(ITEM_LISTS)
 async def delete_item(
     item_id: int,
     db: AsyncSession = Depends(get_db),
@@ -523,15 +598,12 @@ async def delete_item(
             detail="Not enough permissions",
         )
     
-    # Delete images from S3
-    # REMOVE S3 delete_file in delete_item endpoint
-    
-    # Delete item from database
+    # Delete item from database; its image files are removed afterwards
+    enqueue_image_collection(db, item.images)
     await db.delete(item)
     await db.commit()
     
     # Clear cache
-    redis_service.delete(f"items:{item_id}")
-    redis_service.clear_pattern("items:all:*")
+    await redis_service.delete(f"items:{item_id}")
     
     return None
@@ -1,18 +1,76 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.orm import selectinload
-from typing import List
+from typing import List, Optional
 
+from app.api.cache import (
+    ITEM_LISTS,
+    CachedBody,
+    cached_response,
+    encode_response,
+    get_or_build,
+    invalidates,
+)
 from app.api.deps import get_current_active_user
 from app.core.database import get_db
 from app.models.models import Swap, Item, User
 from app.schemas.schemas import Swap as SwapSchema, SwapCreate, SwapUpdate
+from app.services.items import fetch_items_by_ids
 from app.services.redis import redis_service
 
 router = APIRouter()
 
+def _user_basic(user: Optional[User]) -> dict:
+    """Convert a swap participant to a UserBasic dict."""
+    return {
+        'id': user.id if user else 0,
+        'username': user.username if user else 'Unknown',
+        'profile_picture': user.profile_picture if user else None
+    }
+
+def _swap_to_dict(swap: Swap, items_by_id: dict, requester: Optional[User], provider: Optional[User]) -> dict:
+    """Convert a swap to its response dict, with item cards from the shared read layer."""
+    return {
+        'id': swap.id,
+        'requester_id': swap.requester_id,
+        'provider_id': swap.provider_id,
+        'requester_item_id': swap.requester_item_id,
+        'provider_item_id': swap.provider_item_id,
+        'points_used': swap.points_used,
+        'status': swap.status,
+        'created_at': swap.created_at,
+        'updated_at': swap.updated_at,
+        'requester_item': items_by_id.get(swap.requester_item_id),
+        'provider_item': items_by_id.get(swap.provider_item_id),
+        'requester': _user_basic(requester),
+        'provider': _user_basic(provider)
+    }
+
+def _check_participant(requester_id: int, provider_id: int, user: User) -> None:
+    """Raise 403 unless `user` is the requester or provider of a swap."""
+    if user.id not in (requester_id, provider_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+
+def _swap_cache_keys(swap: Swap) -> List[str]:
+    """The cache entries a change to `swap` makes stale: both participants'
+    swap lists, the swap itself and the items it involves."""
+    return [
+        f"swaps:user:{swap.requester_id}",
+        f"swaps:user:{swap.provider_id}",
+        f"swaps:{swap.id}",
+        *[
+            f"items:{item_id}"
+            for item_id in (swap.provider_item_id, swap.requester_item_id)
+            if item_id
+        ],
+    ]
+
 @router.post("", response_model=SwapSchema)
+@invalidates(ITEM_LISTS)
 async def create_swap(
     swap_in: SwapCreate,
     db: AsyncSession = Depends(get_db),
@@ -99,194 +157,62 @@ async def create_swap(
     await db.commit()
     await db.refresh(db_swap)
 
-    # Re-fetch provider_item and requester_item (if any) to avoid expired attributes
-    result = await db.execute(select(Item).where(Item.id == db_swap.provider_item_id))
-    provider_item_fresh = result.scalar_one_or_none()
+    # Load fresh item cards and the provider for the response
+    items_by_id = await fetch_items_by_ids(db, [db_swap.provider_item_id, db_swap.requester_item_id])
+    result = await db.execute(select(User).where(User.id == db_swap.provider_id))
+    provider = result.scalar_one_or_none()
 
-    requester_item_fresh = None
-    if db_swap.requester_item_id:
-        result = await db.execute(select(Item).where(Item.id == db_swap.requester_item_id))
-        requester_item_fresh = result.scalar_one_or_none()
+    # Clear the participants' swap lists and the items whose status changed
+    await redis_service.delete(*_swap_cache_keys(db_swap))
 
-    # Clear cache
-    redis_service.clear_pattern("items:*")
-    redis_service.clear_pattern("swaps:*")
+    return _swap_to_dict(db_swap, items_by_id, current_user, provider)
 
-    # Now use provider_item_fresh and requester_item_fresh to build the response dictionary
-    swap_dict = {
-        'id': db_swap.id,
-        'requester_id': db_swap.requester_id,
-        'provider_id': db_swap.provider_id,
-        'requester_item_id': db_swap.requester_item_id,
-        'provider_item_id': db_swap.provider_item_id,
-        'points_used': db_swap.points_used,
-        'status': db_swap.status,
-        'created_at': db_swap.created_at,
-        'updated_at': db_swap.updated_at,
-        'requester_item': (
-            {
-                'id': requester_item_fresh.id,
-                'title': requester_item_fresh.title,
-                'description': requester_item_fresh.description,
-                'category': requester_item_fresh.category,
-                'type': requester_item_fresh.type,
-                'size': requester_item_fresh.size,
-                'condition': requester_item_fresh.condition,
-                'point_value': requester_item_fresh.point_value,
-                'user_id': requester_item_fresh.user_id,
-                'status': requester_item_fresh.status,
-                'is_approved': requester_item_fresh.is_approved,
-                'created_at': requester_item_fresh.created_at,
-                'updated_at': requester_item_fresh.updated_at,
-                'images': [],
-                'tags': [],
-                'user': None
-            } if requester_item_fresh else None
-        ),
-        'provider_item': {
-            'id': provider_item_fresh.id,
-            'title': provider_item_fresh.title,
-            'description': provider_item_fresh.description,
-            'category': provider_item_fresh.category,
-            'type': provider_item_fresh.type,
-            'size': provider_item_fresh.size,
-            'condition': provider_item_fresh.condition,
-            'point_value': provider_item_fresh.point_value,
-            'user_id': provider_item_fresh.user_id,
-            'status': provider_item_fresh.status,
-            'is_approved': provider_item_fresh.is_approved,
-            'created_at': provider_item_fresh.created_at,
-            'updated_at': provider_item_fresh.updated_at,
-            'images': [],
-            'tags': [],
-            'user': None
-        },
-        'requester': {
-            'id': current_user.id,
-            'username': current_user.username,
-            'profile_picture': current_user.profile_picture
-        },
-        'provider': {
-            'id': provider_item_fresh.user_id,
-            'username': 'Unknown',  # You can load username if needed
-            'profile_picture': None
-        }
-    }
-    
-    return swap_dict
-
-@router.get("", response_model=List[SwapSchema])
-async def get_swaps(
-    db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
-) -> List[SwapSchema]:
-    """
-    Get user's swaps.
-    """
-    # Try to get from cache
-    cache_key = f"swaps:user:{current_user.id}"
-    cached_swaps = redis_service.get(cache_key)
-    if cached_swaps:
-        return cached_swaps
-    
+async def _build_swap_list(db: AsyncSession, user_id: int) -> CachedBody:
     # Query swaps
     result = await db.execute(
         select(Swap)
         .options(
             selectinload(Swap.requester),
-            selectinload(Swap.provider),
-            selectinload(Swap.requester_item),
-            selectinload(Swap.provider_item)
+            selectinload(Swap.provider)
         )
         .where(
-            (Swap.requester_id == current_user.id) | 
-            (Swap.provider_id == current_user.id)
+            (Swap.requester_id == user_id) | 
+            (Swap.provider_id == user_id)
         )
         .order_by(Swap.created_at.desc())
     )
     swaps = result.scalars().all()
     
-    # Convert swaps to dictionaries to avoid serialization issues
-    formatted_swaps = []
-    for swap in swaps:
-        # Convert requester_item to dictionary if it exists
-        requester_item_dict = None
-        if swap.requester_item:
-            requester_item_dict = {
-                'id': swap.requester_item.id,
-                'title': swap.requester_item.title,
-                'description': swap.requester_item.description,
-                'category': swap.requester_item.category,
-                'type': swap.requester_item.type,
-                'size': swap.requester_item.size,
-                'condition': swap.requester_item.condition,
-                'point_value': swap.requester_item.point_value,
-                'user_id': swap.requester_item.user_id,
-                'status': swap.requester_item.status,
-                'is_approved': swap.requester_item.is_approved,
-                'created_at': swap.requester_item.created_at,
-                'updated_at': swap.requester_item.updated_at,
-                'images': [],
-                'tags': [],
-                'user': None
-            }
-        
-        # Convert provider_item to dictionary
-        provider_item_dict = {
-            'id': swap.provider_item.id,
-            'title': swap.provider_item.title,
-            'description': swap.provider_item.description,
-            'category': swap.provider_item.category,
-            'type': swap.provider_item.type,
-            'size': swap.provider_item.size,
-            'condition': swap.provider_item.condition,
-            'point_value': swap.provider_item.point_value,
-            'user_id': swap.provider_item.user_id,
-            'status': swap.provider_item.status,
-            'is_approved': swap.provider_item.is_approved,
-            'created_at': swap.provider_item.created_at,
-            'updated_at': swap.provider_item.updated_at,
-            'images': [],
-            'tags': [],
-            'user': None
-        }
-        
-        # Convert requester to dictionary
-        requester_dict = {
-            'id': swap.requester.id,
-            'username': swap.requester.username,
-            'profile_picture': swap.requester.profile_picture
-        }
-        
-        # Convert provider to dictionary
-        provider_dict = {
-            'id': swap.provider.id,
-            'username': swap.provider.username,
-            'profile_picture': swap.provider.profile_picture
-        }
-        
-        swap_dict = {
-            'id': swap.id,
-            'requester_id': swap.requester_id,
-            'provider_id': swap.provider_id,
-            'requester_item_id': swap.requester_item_id,
-            'provider_item_id': swap.provider_item_id,
-            'points_used': swap.points_used,
-            'status': swap.status,
-            'created_at': swap.created_at,
-            'updated_at': swap.updated_at,
-            'requester_item': requester_item_dict,
-            'provider_item': provider_item_dict,
-            'requester': requester_dict,
-            'provider': provider_dict
-        }
-        
-        formatted_swaps.append(swap_dict)
+    # Load every item involved in one query
+    items_by_id = await fetch_items_by_ids(
+        db,
+        [swap.provider_item_id for swap in swaps] + [swap.requester_item_id for swap in swaps]
+    )
     
-    # Cache results
-    redis_service.set(cache_key, formatted_swaps, expire_seconds=300)  # 5 minutes
+    formatted_swaps = [
+        _swap_to_dict(swap, items_by_id, swap.requester, swap.provider)
+        for swap in swaps
+    ]
     
-    return formatted_swaps
+    # Validate and encode once; cache hits are served as these exact bytes
+    return CachedBody.build(encode_response(List[SwapSchema], formatted_swaps))
+
+@router.get("", response_model=List[SwapSchema])
+async def get_swaps(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+) -> Response:
+    """
+    Get user's swaps.
+    """
+    entry = await get_or_build(
+        f"swaps:user:{current_user.id}",
+        db,
+        lambda session: _build_swap_list(session, current_user.id),
+        expire_seconds=300  # 5 minutes
+    )
+    return cached_response(request, entry, private=True)
 
 @router.get("/{swap_id}", response_model=SwapSchema)
 async def get_swap(
@@ -297,10 +223,12 @@ async def get_swap(
     """
     Get swap by ID.
     """
-    # Try to get from cache
+    # Try to get from cache; the entry is shared by both participants, so
+    # check the user is one of them before serving it
     cache_key = f"swaps:{swap_id}"
-    cached_swap = redis_service.get(cache_key)
+    cached_swap = await redis_service.get(cache_key)
     if cached_swap:
+        _check_participant(cached_swap["requester_id"], cached_swap["provider_id"], current_user)
         return cached_swap
     
     # Query swap
@@ -308,9 +236,7 @@ async def get_swap(
         select(Swap)
         .options(
             selectinload(Swap.requester),
-            selectinload(Swap.provider),
-            selectinload(Swap.requester_item),
-            selectinload(Swap.provider_item)
+            selectinload(Swap.provider)
         )
         .where(Swap.id == swap_id)
     )
@@ -323,91 +249,18 @@ async def get_swap(
         )
     
     # Check if user is part of the swap
-    if swap.requester_id != current_user.id and swap.provider_id != current_user.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions",
-        )
-    
-    # Convert swap to dictionary to avoid serialization issues
-    # Convert requester_item to dictionary if it exists
-    requester_item_dict = None
-    if swap.requester_item:
-        requester_item_dict = {
-            'id': swap.requester_item.id,
-            'title': swap.requester_item.title,
-            'description': swap.requester_item.description,
-            'category': swap.requester_item.category,
-            'type': swap.requester_item.type,
-            'size': swap.requester_item.size,
-            'condition': swap.requester_item.condition,
-            'point_value': swap.requester_item.point_value,
-            'user_id': swap.requester_item.user_id,
-            'status': swap.requester_item.status,
-            'is_approved': swap.requester_item.is_approved,
-            'created_at': swap.requester_item.created_at,
-            'updated_at': swap.requester_item.updated_at,
-            'images': [],
-            'tags': [],
-            'user': None
-        }
+    _check_participant(swap.requester_id, swap.provider_id, current_user)
     
-    # Convert provider_item to dictionary
-    provider_item_dict = {
-        'id': swap.provider_item.id,
-        'title': swap.provider_item.title,
-        'description': swap.provider_item.description,
-        'category': swap.provider_item.category,
-        'type': swap.provider_item.type,
-        'size': swap.provider_item.size,
-        'condition': swap.provider_item.condition,
-        'point_value': swap.provider_item.point_value,
-        'user_id': swap.provider_item.user_id,
-        'status': swap.provider_item.status,
-        'is_approved': swap.provider_item.is_approved,
-        'created_at': swap.provider_item.created_at,
-        'updated_at': swap.provider_item.updated_at,
-        'images': [],
-        'tags': [],
-        'user': None
-    }
-    
-    # Convert requester to dictionary
-    requester_dict = {
-        'id': swap.requester.id,
-        'username': swap.requester.username,
-        'profile_picture': swap.requester.profile_picture
-    }
-    
-    # Convert provider to dictionary
-    provider_dict = {
-        'id': swap.provider.id,
-        'username': swap.provider.username,
-        'profile_picture': swap.provider.profile_picture
-    }
-    
-    swap_dict = {
-        'id': swap.id,
-        'requester_id': swap.requester_id,
-        'provider_id': swap.provider_id,
-        'requester_item_id': swap.requester_item_id,
-        'provider_item_id': swap.provider_item_id,
-        'points_used': swap.points_used,
-        'status': swap.status,
-        'created_at': swap.created_at,
-        'updated_at': swap.updated_at,
-        'requester_item': requester_item_dict,
-        'provider_item': provider_item_dict,
-        'requester': requester_dict,
-        'provider': provider_dict
-    }
+    items_by_id = await fetch_items_by_ids(db, [swap.provider_item_id, swap.requester_item_id])
+    swap_dict = _swap_to_dict(swap, items_by_id, swap.requester, swap.provider)
     
     # Cache swap
-    redis_service.set(cache_key, swap_dict, expire_seconds=300)  # 5 minutes
+    await redis_service.set(cache_key, swap_dict, expire_seconds=300)  # 5 minutes
     
     return swap_dict
 
 @router.put("/{swap_id}", response_model=SwapSchema)
+@invalidates(ITEM_LISTS)
 async def update_swap(
     swap_id: int,
     swap_update: SwapUpdate,
@@ -518,75 +371,9 @@ async def update_swap(
     await db.refresh(swap)
     
     # Clear cache
-    redis_service.delete(f"swaps:{swap_id}")
-    redis_service.clear_pattern("swaps:user:*")
-    redis_service.clear_pattern("items:*")
-    
-    # Convert swap to dictionary to avoid serialization issues
-    # Convert requester_item to dictionary if it exists
-    requester_item_dict = None
-    if swap.requester_item:
-        requester_item_dict = {
-            'id': swap.requester_item.id,
-            'title': swap.requester_item.title,
-            'description': swap.requester_item.description,
-            'category': swap.requester_item.category,
-            'type': swap.requester_item.type,
-            'size': swap.requester_item.size,
-            'condition': swap.requester_item.condition,
-            'point_value': swap.requester_item.point_value,
-            'user_id': swap.requester_item.user_id,
-            'status': swap.requester_item.status,
-            'is_approved': swap.requester_item.is_approved,
-            'created_at': swap.requester_item.created_at,
-            'updated_at': swap.requester_item.updated_at,
-            'images': [],
-            'tags': [],
-            'user': None
-        }
-    
-    # Convert provider_item to dictionary
-    provider_item_dict = {
-        'id': swap.provider_item.id,
-        'title': swap.provider_item.title,
-        'description': swap.provider_item.description,
-        'category': swap.provider_item.category,
-        'type': swap.provider_item.type,
-        'size': swap.provider_item.size,
-        'condition': swap.provider_item.condition,
-        'point_value': swap.provider_item.point_value,
-        'user_id': swap.provider_item.user_id,
-        'status': swap.provider_item.status,
-        'is_approved': swap.provider_item.is_approved,
-        'created_at': swap.provider_item.created_at,
-        'updated_at': swap.provider_item.updated_at,
-        'images': [],
-        'tags': [],
-        'user': None
-    }
+    await redis_service.delete(*_swap_cache_keys(swap))
     
-    swap_dict = {
-        'id': swap.id,
-        'requester_id': swap.requester_id,
-        'provider_id': swap.provider_id,
-        'requester_item_id': swap.requester_item_id,
-        'provider_item_id': swap.provider_item_id,
-        'points_used': swap.points_used,
-        'status': swap.status,
-        'created_at': swap.created_at,
-        'updated_at': swap.updated_at,
-        'requester_item': requester_item_dict,
-        'provider_item': provider_item_dict,
-        'requester': {
-            'id': requester.id if requester else 0,
-            'username': requester.username if requester else 'Unknown',
-            'profile_picture': requester.profile_picture if requester else None
-        },
-        'provider': {
-            'id': provider.id if provider else 0,
-            'username': provider.username if provider else 'Unknown',
-            'profile_picture': provider.profile_picture if provider else None
-        }
-    }
+    items_by_id = await fetch_items_by_ids(db, [swap.provider_item_id, swap.requester_item_id])
+    swap_dict = _swap_to_dict(swap, items_by_id, requester, provider)
     
     return swap_dict
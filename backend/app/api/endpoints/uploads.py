@@ -0,0 +1,48 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+
+from app.api.deps import get_current_active_user
+from app.models.models import User
+from app.schemas.schemas import UploadRequest, UploadTicket
+from app.services.s3 import LocalStorage, storage
+from app.services.uploads import presign_upload, receive_upload
+
+router = APIRouter()
+
+@router.post("", response_model=UploadTicket)
+async def create_upload(
+    upload_in: UploadRequest,
+    current_user: User = Depends(get_current_active_user),
+) -> UploadTicket:
+    """
+    Get a URL to upload an image straight to storage.
+
+    Send the file with the returned method, URL and headers, then pass the
+    key in `image_keys` when creating the item. Images named by a SHA-256
+    that is already stored come back with `exists` set and need no upload.
+    """
+    return await presign_upload(upload_in.sha256, upload_in.content_type, upload_in.size)
+
+@router.put("/{key}", status_code=status.HTTP_204_NO_CONTENT)
+async def receive_local_upload(
+    key: str,
+    request: Request,
+    token: str = Query(...),
+) -> None:
+    """
+    Receive an upload for a URL issued by the local storage backend; with
+    S3, clients upload to the bucket instead.
+    """
+    if not isinstance(storage, LocalStorage):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Uploads go straight to storage",
+        )
+    size = storage.verify_upload_token(token, key)
+    if size is None:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Invalid or expired upload URL",
+        )
+
+    await receive_upload(request.stream(), key, size, request.headers.get("content-type"))
+    return None
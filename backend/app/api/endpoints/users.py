@@ -4,11 +4,12 @@ from sqlalchemy import select
 from typing import List
 
 from app.api.deps import get_current_active_user, get_admin_user
-from app.core.database import get_db
+from app.core.database import get_db, get_dialect_name
 from app.core.security import get_password_hash
 from app.models.models import User, Item
 from app.schemas.schemas import User as UserSchema
 from app.schemas.schemas import UserUpdate, Item as ItemSchema
+from app.services.items import fetch_items, select_items
 
 router = APIRouter()
 
@@ -83,16 +84,15 @@ async def get_user_items(
     Get user's items.
     """
     # Query user items
-    result = await db.execute(
-        select(Item)
+    query = (
+        select_items(get_dialect_name(db))
         .where(Item.user_id == user_id, Item.is_approved == True)
         .order_by(Item.created_at.desc())
     )
-    items = result.scalars().all()
     
     # Check if viewing own items or items are public
     if user_id != current_user.id:
         # Filter out non-public items
-        items = [item for item in items if item.status == "available"]
+        query = query.where(Item.status == "available")
     
-    return items
+    return await fetch_items(db, query)
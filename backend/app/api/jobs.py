@@ -0,0 +1,74 @@
+from typing import Any, Dict, Iterable
+
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.cache import ITEM_LISTS
+from app.models.models import Image
+from app.services.image_gc import collect_image_files, stored_filename
+from app.services.images import derive_variants_many
+from app.services.jobs import enqueue, job_handler
+from app.services.redis import redis_service
+from app.services.s3 import storage
+
+# Job kinds
+DERIVE_ITEM_VARIANTS = "items.derive_variants"
+COLLECT_IMAGE_FILES = "images.collect_files"
+
+
+@job_handler(DERIVE_ITEM_VARIANTS)
+async def derive_item_variants(db: AsyncSession, payload: Dict[str, Any]) -> None:
+    """
+    Render the resized variants of an item's uploaded images and record
+    them, then drop the cached copies of the item that were built without.
+    """
+    item_id = payload["item_id"]
+    result = await db.execute(
+        select(Image.id, Image.image_url)
+        .where(Image.item_id == item_id, Image.storage_key.is_not(None))
+    )
+    rows = result.all()
+    if not rows:
+        return
+    
+    # Variants already stored are reused, so reruns are cheap
+    variants = await derive_variants_many([storage.key_from_url(image_url) for _, image_url in rows])
+    updates = [
+        {"image_id": image_id, "image_variants": image_variants}
+        for (image_id, _), image_variants in zip(rows, variants)
+        if image_variants
+    ]
+    if not updates:
+        return
+    await db.execute(
+        update(Image.__table__)
+        .where(Image.__table__.c.id == bindparam("image_id"))
+        .values(variants=bindparam("image_variants")),
+        updates
+    )
+    await db.commit()
+    
+    await redis_service.delete(f"items:{item_id}")
+    await redis_service.invalidate_namespaces([ITEM_LISTS])
+
+
+@job_handler(COLLECT_IMAGE_FILES)
+async def collect_deleted_image_files(db: AsyncSession, payload: Dict[str, Any]) -> None:
+    """Delete the files of removed images once no other row references them."""
+    removed = await collect_image_files(db, payload["filenames"])
+    if removed:
+        print(f"Removed {len(removed)} unreferenced image files")
+
+
+def enqueue_image_collection(db: AsyncSession, images: Iterable[Image]) -> None:
+    """
+    Queue the files of images being deleted in this transaction for
+    collection, so they go only if the delete commits.
+    """
+    filenames = sorted({
+        filename
+        for filename in (stored_filename(image.image_url) for image in images)
+        if filename
+    })
+    if filenames:
+        enqueue(db, COLLECT_IMAGE_FILES, {"filenames": filenames})
@@ -18,6 +18,58 @@ class Settings(BaseModel):
     
     # CORS Configuration - Allow all origins for demo
     CORS_ORIGINS: List[str] = ["*"]
+    
+    # Redis connection pool
+    REDIS_MAX_CONNECTIONS: int = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+    REDIS_SOCKET_TIMEOUT: float = float(os.getenv("REDIS_SOCKET_TIMEOUT", 0.5))
+    REDIS_CONNECT_TIMEOUT: float = float(os.getenv("REDIS_CONNECT_TIMEOUT", 1.0))
+    
+    # In-process cache tier in front of Redis; 0 entries disables it.
+    # Without REDIS_URL these also bound the in-memory backend.
+    CACHE_LOCAL_MAX_ENTRIES: int = int(os.getenv("CACHE_LOCAL_MAX_ENTRIES", 2048))
+    CACHE_LOCAL_MAX_BYTES: int = int(os.getenv("CACHE_LOCAL_MAX_BYTES", 64 * 1024 * 1024))
+    CACHE_LOCAL_TTL: float = float(os.getenv("CACHE_LOCAL_TTL", 30))
+    
+    # Encoding of cached values: "orjson", "msgpack" or "json"
+    CACHE_CODEC: str = os.getenv("CACHE_CODEC", "orjson")
+    # Compression of values stored in Redis: "zlib", "zstd" or "none"
+    CACHE_COMPRESSION: str = os.getenv("CACHE_COMPRESSION", "zlib")
+    CACHE_COMPRESS_MIN_BYTES: int = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", 1024))
+    
+    # Upload limits, enforced while the bytes stream in
+    MAX_UPLOAD_FILE_BYTES: int = int(os.getenv("MAX_UPLOAD_FILE_BYTES", 10 * 1024 * 1024))
+    MAX_UPLOAD_REQUEST_BYTES: int = int(os.getenv("MAX_UPLOAD_REQUEST_BYTES", 50 * 1024 * 1024))
+    
+    # Where image files are kept: "local" (app/static/images) or "s3".
+    # S3_ENDPOINT_URL points the S3 backend at MinIO or another stand-in;
+    # S3_PUBLIC_URL is the base of image URLs, e.g. a CDN in front of the bucket.
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "local")
+    S3_BUCKET: str = os.getenv("AWS_STORAGE_BUCKET_NAME", "rewear-images")
+    S3_REGION: Optional[str] = os.getenv("AWS_REGION")
+    S3_ENDPOINT_URL: Optional[str] = os.getenv("S3_ENDPOINT_URL")
+    S3_PUBLIC_URL: Optional[str] = os.getenv("S3_PUBLIC_URL")
+    # Files larger than the threshold are sent to S3 in parts of the chunk size
+    S3_MULTIPART_THRESHOLD: int = int(os.getenv("S3_MULTIPART_THRESHOLD", 8 * 1024 * 1024))
+    S3_MULTIPART_CHUNK_SIZE: int = int(os.getenv("S3_MULTIPART_CHUNK_SIZE", 8 * 1024 * 1024))
+    # Lifetime of presigned upload URLs; keep IMAGE_GC_GRACE_SECONDS above it
+    # so a direct upload is not collected before its item is created
+    UPLOAD_URL_EXPIRE_SECONDS: int = int(os.getenv("UPLOAD_URL_EXPIRE_SECONDS", 900))
+    
+    # Processes rendering image variants; 0 means one per CPU
+    IMAGE_PROCESS_WORKERS: int = int(os.getenv("IMAGE_PROCESS_WORKERS", 0))
+    # Unreferenced image files are kept until untouched for this long, since
+    # an upload of the same content may be about to reference them again
+    IMAGE_GC_GRACE_SECONDS: float = float(os.getenv("IMAGE_GC_GRACE_SECONDS", 3600))
+    
+    # Background jobs run by each API process; 0 leaves them to run_jobs.py
+    JOB_WORKERS: int = int(os.getenv("JOB_WORKERS", 2))
+    JOB_POLL_INTERVAL: float = float(os.getenv("JOB_POLL_INTERVAL", 1.0))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", 5))
+    # Retry delay doubles per attempt, from the base up to the cap
+    JOB_RETRY_BASE_SECONDS: float = float(os.getenv("JOB_RETRY_BASE_SECONDS", 5))
+    JOB_RETRY_MAX_SECONDS: float = float(os.getenv("JOB_RETRY_MAX_SECONDS", 600))
+    # A running job not finished within this is presumed lost and rerun
+    JOB_LEASE_SECONDS: float = float(os.getenv("JOB_LEASE_SECONDS", 300))
 
 
 settings = Settings()
@@ -34,6 +34,10 @@ AsyncSessionLocal = sessionmaker(
 # Base class for all models
 Base = declarative_base()
 
+def get_dialect_name(db: AsyncSession) -> str:
+    """Return the name of the SQL dialect ("sqlite", "postgresql", ...) a session is bound to."""
+    return db.bind.dialect.name
+
 # Dependency to get DB session
 async def get_db():
     db = AsyncSessionLocal()
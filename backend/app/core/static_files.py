@@ -0,0 +1,288 @@
+import os
+import re
+import stat
+from mimetypes import guess_type
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers, QueryParams
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Receive, Scope, Send
+
+from app.services.images import VARIANTS, variant_filename
+
+# Content-named files never change under the same URL, so clients may keep
+# them for a year without revalidating
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Anything else (placeholder.png, ...) is revalidated against its ETag
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+# SHA-256 storage keys, plus the uuid4 hex names used before content
+# addressing; neither is ever rewritten in place. Variants add a suffix
+_CONTENT_NAME = re.compile(
+    r"^(?:[0-9a-f]{64}|[0-9a-f]{32})(?:\.(?:%s))?\.[A-Za-z0-9]+$" % "|".join(VARIANTS)
+)
+
+# Precompressed siblings, in order of preference. Photos are already
+# compressed, so these are only looked up for other media types
+_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+PATHSEND = "http.response.pathsend"
+ZEROCOPYSEND = "http.response.zerocopysend"
+
+
+class _Representation(NamedTuple):
+    full_path: str
+    stat_result: os.stat_result
+    media_type: str
+    headers: Dict[str, str]
+
+
+def _accepts(header: str, token: str) -> bool:
+    # Only an explicit listing counts; "*/*" says nothing about WebP support
+    for part in header.split(","):
+        value, *params = [p.strip() for p in part.split(";")]
+        if value.lower() != token:
+            continue
+        for param in params:
+            key, _, q = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    return float(q) > 0
+                except ValueError:
+                    return False
+        return True
+    return False
+
+
+def _is_compressible(media_type: str) -> bool:
+    return not media_type.startswith("image/") or media_type == "image/svg+xml"
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single `bytes=` range into an inclusive (start, end) pair.
+
+    Returns None when the header should be ignored (malformed, not bytes,
+    or multiple ranges, which are answered with the full file) and raises
+    ValueError when the range cannot be satisfied.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        elif last:
+            # Suffix range: the final N bytes
+            start = max(size - int(last), 0)
+            end = size - 1
+        else:
+            return None
+    except ValueError:
+        return None
+    if start >= size:
+        raise ValueError("range not satisfiable")
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+class StaticFileResponse(FileResponse):
+    """
+    FileResponse that can answer a single byte range and hands the file to
+    the server when it advertises the ASGI pathsend or zerocopysend
+    extensions, so the body never passes through Python.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        stat_result: os.stat_result,
+        method: str,
+        headers: Optional[Dict[str, str]] = None,
+        media_type: Optional[str] = None,
+        byte_range: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        super().__init__(
+            path,
+            status_code=206 if byte_range else 200,
+            headers=headers,
+            media_type=media_type,
+            stat_result=stat_result,
+            method=method,
+        )
+        self.headers["accept-ranges"] = "bytes"
+        self.byte_range = byte_range
+        if byte_range is not None:
+            start, end = byte_range
+            self.headers["content-range"] = f"bytes {start}-{end}/{stat_result.st_size}"
+            self.headers["content-length"] = str(end - start + 1)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": self.status_code,
+                "headers": self.raw_headers,
+            }
+        )
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        extensions = scope.get("extensions") or {}
+        if self.byte_range is None:
+            start, count = 0, self.stat_result.st_size
+        else:
+            start, count = self.byte_range[0], self.byte_range[1] - self.byte_range[0] + 1
+
+        if PATHSEND in extensions and self.byte_range is None:
+            await send({"type": PATHSEND, "path": str(self.path)})
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            if ZEROCOPYSEND in extensions:
+                await send(
+                    {
+                        "type": ZEROCOPYSEND,
+                        "file": file.wrapped,
+                        "offset": start,
+                        "count": count,
+                        "more_body": False,
+                    }
+                )
+                return
+
+            # Fallback for servers without either extension (uvicorn)
+            await file.seek(start)
+            remaining = count
+            while True:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                remaining -= len(chunk)
+                more_body = bool(chunk) and remaining > 0
+                await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+                if not more_body:
+                    break
+
+
+class ImageStaticFiles(StaticFiles):
+    """
+    StaticFiles for the uploaded image directory.
+
+    Adds long-lived caching for content-named files, single byte-range
+    requests, `?variant=card|detail|full` negotiation between the WebP and
+    JPEG renditions written by app.services.images, and precompressed
+    `.br`/`.gz` siblings for compressible files.
+    """
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405)
+
+        try:
+            selected = await anyio.to_thread.run_sync(self.select_representation, path, scope)
+        except PermissionError:
+            raise HTTPException(status_code=401)
+        if selected is None:
+            raise HTTPException(status_code=404)
+        return self.representation_response(selected, scope)
+
+    def _lookup_file(self, path: str) -> Optional[Tuple[str, os.stat_result]]:
+        full_path, stat_result = self.lookup_path(path)
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            return None
+        return full_path, stat_result
+
+    def select_representation(self, path: str, scope: Scope) -> Optional[_Representation]:
+        request_headers = Headers(scope=scope)
+        headers: Dict[str, str] = {}
+        vary = []
+
+        found = self._lookup_file(path)
+        if found is None:
+            return None
+        name = os.path.basename(path)
+        headers["cache-control"] = (
+            IMMUTABLE_CACHE_CONTROL if _CONTENT_NAME.match(name) else REVALIDATE_CACHE_CONTROL
+        )
+
+        variant = QueryParams(scope["query_string"]).get("variant")
+        if variant in VARIANTS:
+            # Fall back to the original until the variants have been rendered
+            vary.append("Accept")
+            stem = os.path.splitext(name)[0]
+            fmt = "webp" if _accepts(request_headers.get("accept", ""), "image/webp") else "jpeg"
+            variant_path = os.path.join(os.path.dirname(path), variant_filename(stem, variant, fmt))
+            rendered = self._lookup_file(variant_path)
+            if rendered is not None:
+                found, path = rendered, variant_path
+            else:
+                # Not the variant's final content, so it must not be cached for long
+                headers["cache-control"] = REVALIDATE_CACHE_CONTROL
+
+        media_type = guess_type(path)[0] or "application/octet-stream"
+        if _is_compressible(media_type):
+            vary.append("Accept-Encoding")
+            accept_encoding = request_headers.get("accept-encoding", "")
+            for encoding, suffix in _ENCODINGS:
+                if not _accepts(accept_encoding, encoding):
+                    continue
+                compressed = self._lookup_file(path + suffix)
+                if compressed is not None:
+                    found = compressed
+                    headers["content-encoding"] = encoding
+                    break
+
+        if vary:
+            headers["vary"] = ", ".join(vary)
+        full_path, stat_result = found
+        return _Representation(full_path, stat_result, media_type, headers)
+
+    def representation_response(self, selected: _Representation, scope: Scope) -> Response:
+        method = scope["method"]
+        request_headers = Headers(scope=scope)
+        response = StaticFileResponse(
+            selected.full_path,
+            selected.stat_result,
+            method,
+            headers=selected.headers,
+            media_type=selected.media_type,
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+
+        range_header = request_headers.get("range")
+        if range_header is None or not self._if_range_matches(response.headers, request_headers):
+            return response
+        size = selected.stat_result.st_size
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            headers = dict(selected.headers)
+            headers["content-range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+        if byte_range is None or byte_range == (0, size - 1):
+            return response
+        return StaticFileResponse(
+            selected.full_path,
+            selected.stat_result,
+            method,
+            headers=selected.headers,
+            media_type=selected.media_type,
+            byte_range=byte_range,
+        )
+
+    @staticmethod
+    def _if_range_matches(response_headers: Headers, request_headers: Headers) -> bool:
+        # A Range guarded by If-Range only applies if the file is unchanged
+        if_range = request_headers.get("if-range")
+        if if_range is None:
+            return True
+        return if_range in (response_headers["etag"], response_headers["last-modified"])
@@ -1,18 +1,47 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
 from app.api.api import api_router
 from app.core.config import settings
+from app.core.middleware import RequestSizeLimitMiddleware
+from app.core.static_files import ImageStaticFiles
+from app.services.images import shutdown_pool
+from app.services.jobs import job_worker
+from app.services.redis import redis_service
+from app.services.uploads import IMAGE_DIR
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await redis_service.start()
+    # With JOB_WORKERS=0, jobs are left to a separate run_jobs.py process
+    if settings.JOB_WORKERS:
+        await job_worker.start()
+    yield
+    # Finish running jobs, then release pooled Redis connections and image
+    # workers on shutdown
+    await job_worker.stop()
+    await redis_service.close()
+    shutdown_pool()
 
 app = FastAPI(
     title="ReWear API",
     description="API for the ReWear clothing exchange platform",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Uploaded images get long-lived caching, ranges and variant negotiation;
+# mounted first so it takes precedence over the generic /static mount
+app.mount("/static/images", ImageStaticFiles(directory=IMAGE_DIR), name="images")
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 
+# Cut off oversized uploads before they are spooled; added first so
+# CORS headers still wrap the 413
+app.add_middleware(RequestSizeLimitMiddleware, max_bytes=settings.MAX_UPLOAD_REQUEST_BYTES)
+
 # Set up CORS middleware with explicit origins
 app.add_middleware(
     CORSMiddleware,
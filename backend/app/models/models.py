@@ -1,4 +1,7 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, Float, Table
+from sqlalchemy import (
+    Column, Integer, String, ForeignKey, DateTime, Boolean, Float, JSON, Table, DDL, Index,
+    event, and_, true, false, literal,
+)
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
@@ -53,6 +56,71 @@ class Item(Base):
     requester_swaps = relationship("Swap", foreign_keys="Swap.requester_item_id", back_populates="requester_item")
     provider_swaps = relationship("Swap", foreign_keys="Swap.provider_item_id", back_populates="provider_item")
 
+# Items visible on the public browse page. The status is rendered inline rather
+# than as a bound parameter so the planner can match the partial indexes below.
+ITEM_IS_LISTED = and_(
+    Item.is_approved == true(),
+    Item.status == literal("available", literal_execute=True),
+)
+ITEM_IS_PENDING_APPROVAL = Item.is_approved == false()
+
+# Composite indexes for the hot query shapes
+Index("ix_items_browse", Item.created_at, Item.id, postgresql_where=ITEM_IS_LISTED, sqlite_where=ITEM_IS_LISTED)
+Index("ix_items_browse_category", Item.category, Item.created_at, Item.id, postgresql_where=ITEM_IS_LISTED, sqlite_where=ITEM_IS_LISTED)
+Index("ix_items_browse_condition", Item.condition, Item.created_at, Item.id, postgresql_where=ITEM_IS_LISTED, sqlite_where=ITEM_IS_LISTED)
+Index("ix_items_browse_size", Item.size, Item.created_at, Item.id, postgresql_where=ITEM_IS_LISTED, sqlite_where=ITEM_IS_LISTED)
+Index("ix_items_pending", Item.created_at, postgresql_where=ITEM_IS_PENDING_APPROVAL, sqlite_where=ITEM_IS_PENDING_APPROVAL)
+Index("ix_items_user_created", Item.user_id, Item.created_at)
+
+# Full-text search over item title and description.
+# SQLite: an external-content FTS5 table kept in sync by triggers.
+# Postgres: a GIN expression index that the query in app/services/search.py matches.
+ITEM_SEARCH_DDL = {
+    "sqlite": [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+            title, description, content='items', content_rowid='id'
+        )
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS items_fts_ai AFTER INSERT ON items BEGIN
+            INSERT INTO items_fts(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS items_fts_ad AFTER DELETE ON items BEGIN
+            INSERT INTO items_fts(items_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS items_fts_au AFTER UPDATE OF title, description ON items BEGIN
+            INSERT INTO items_fts(items_fts, rowid, title, description)
+            VALUES ('delete', old.id, old.title, old.description);
+            INSERT INTO items_fts(rowid, title, description)
+            VALUES (new.id, new.title, new.description);
+        END
+        """,
+    ],
+    "postgresql": [
+        """
+        CREATE INDEX IF NOT EXISTS ix_items_search ON items USING gin (
+            to_tsvector('english'::regconfig, coalesce(title, '') || ' ' || coalesce(description, ''))
+        )
+        """,
+    ],
+}
+
+for _dialect, _statements in ITEM_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Item.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+event.listen(
+    Item.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS items_fts").execute_if(dialect="sqlite"),
+)
+
 class Image(Base):
     __tablename__ = "images"
     
@@ -60,11 +128,18 @@ class Image(Base):
     image_url = Column(String, nullable=False)
     is_primary = Column(Boolean, default=False)
     item_id = Column(Integer, ForeignKey("items.id"), nullable=False)
+    # SHA-256 of the stored file; rows sharing a key share the file
+    storage_key = Column(String, nullable=True)
+    # URLs of the resized copies by variant and format, e.g. {"card": {"webp": ...}}
+    variants = Column(JSON, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     item = relationship("Item", back_populates="images")
 
+Index("ix_images_item_id", Image.item_id)
+Index("ix_images_storage_key", Image.storage_key)
+
 class Swap(Base):
     __tablename__ = "swaps"
     
@@ -84,6 +159,9 @@ class Swap(Base):
     requester_item = relationship("Item", foreign_keys=[requester_item_id], back_populates="requester_swaps")
     provider_item = relationship("Item", foreign_keys=[provider_item_id], back_populates="provider_swaps")
 
+Index("ix_swaps_requester_created", Swap.requester_id, Swap.created_at)
+Index("ix_swaps_provider_created", Swap.provider_id, Swap.created_at)
+
 class Tag(Base):
     __tablename__ = "tags"
     
@@ -92,3 +170,24 @@ class Tag(Base):
     
     # Relationships
     items = relationship("Item", secondary=item_tag, back_populates="tags")
+
+Index("ix_item_tag_tag_id", item_tag.c.tag_id)
+
+class Job(Base):
+    __tablename__ = "jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    # queued -> running -> deleted on success; "failed" once out of attempts
+    status = Column(String, nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False)
+    run_at = Column(DateTime(timezone=True), nullable=False)
+    locked_at = Column(DateTime(timezone=True), nullable=True)
+    locked_by = Column(String, nullable=True)
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+# Workers claim the oldest due jobs
+Index("ix_jobs_claim", Job.status, Job.run_at)
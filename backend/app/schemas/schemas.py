@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional, List, Union
+from typing import Dict, Optional, List, Union
 from datetime import datetime
 
 # ------------------- User Schemas -------------------
@@ -71,6 +71,8 @@ class ItemBase(BaseModel):
 
 class ItemCreate(ItemBase):
     tags: Optional[List[str]] = []
+    # Keys of images already sent to storage through POST /api/uploads
+    image_keys: Optional[List[str]] = []
 
 class ItemUpdate(BaseModel):
     title: Optional[str] = None
@@ -98,6 +100,11 @@ class Item(ItemInDB):
     tags: List[str] = []
     user: Union["UserBasic", None] = None
 
+class ItemPage(BaseModel):
+    items: List[Item] = []
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+
 # ------------------- Image Schemas -------------------
 
 class ImageBase(BaseModel):
@@ -110,11 +117,26 @@ class ImageCreate(ImageBase):
 class Image(ImageBase):
     id: int
     item_id: int
+    # Resized copies by variant ("card", "detail", "full") and format ("webp", "jpeg")
+    variants: Optional[Dict[str, Dict[str, str]]] = None
     created_at: datetime
 
     class Config:
         from_attributes = True
 
+class UploadRequest(BaseModel):
+    sha256: str             # hex SHA-256 of the file, computed by the client
+    content_type: str
+    size: int = Field(..., gt=0)
+
+class UploadTicket(BaseModel):
+    key: str                # pass in ItemCreate.image_keys once uploaded
+    exists: bool            # already stored; nothing to upload
+    method: Optional[str] = None
+    url: Optional[str] = None
+    headers: Dict[str, str] = {}    # send exactly these with the upload
+    expires_in: Optional[int] = None
+
 # ------------------- Swap Schemas -------------------
 
 class SwapBase(BaseModel):
@@ -178,4 +200,5 @@ class ItemBasic(BaseModel):
 
 # Update forward refs
 Item.update_forward_refs()
+ItemPage.update_forward_refs()
 Swap.update_forward_refs()
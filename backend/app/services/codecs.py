@@ -0,0 +1,143 @@
+"""
+Serialization and compression of values stored in Redis.
+
+A codec turns Python values into bytes and back; unlike `json.dumps`, all
+of them handle the datetimes found in item and swap payloads. Compression
+is applied to every stored value above a size threshold and is recorded in
+a one-byte frame marker, so entries written with any setting stay readable.
+"""
+import json
+import zlib
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional
+    zstandard = None
+
+
+class Codec:
+    """Encodes cache values to bytes and back."""
+    name = "base"
+
+    def encode(self, value: Any) -> bytes:
+        raise NotImplementedError
+
+    def decode(self, data: bytes) -> Any:
+        raise NotImplementedError
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class JsonCodec(Codec):
+    """Standard library JSON; datetimes become ISO 8601 strings."""
+    name = "json"
+
+    def encode(self, value: Any) -> bytes:
+        return json.dumps(value, default=_json_default, separators=(",", ":")).encode()
+
+    def decode(self, data: bytes) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(Codec):
+    """orjson; serializes datetimes natively and is several times faster."""
+    name = "orjson"
+
+    def encode(self, value: Any) -> bytes:
+        return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+
+    def decode(self, data: bytes) -> Any:
+        return orjson.loads(data)
+
+
+class MsgpackCodec(Codec):
+    """MessagePack; datetimes round-trip as datetimes instead of strings."""
+    name = "msgpack"
+
+    def encode(self, value: Any) -> bytes:
+        return msgpack.packb(value, datetime=True, default=self._default)
+
+    def decode(self, data: bytes) -> Any:
+        return msgpack.unpackb(data, timestamp=3, strict_map_key=False)
+
+    @staticmethod
+    def _default(value: Any) -> Any:
+        # The timestamp extension needs an aware datetime
+        if isinstance(value, datetime):
+            return value.isoformat()
+        return _json_default(value)
+
+
+CODECS: Dict[str, Callable[[], Codec]] = {
+    "json": JsonCodec,
+    "orjson": OrjsonCodec,
+    "msgpack": MsgpackCodec,
+}
+
+
+def get_codec(name: str) -> Codec:
+    """Return the named codec, falling back to stdlib JSON if its package is missing."""
+    if name == "orjson" and orjson is None or name == "msgpack" and msgpack is None:
+        print(f"Cache codec {name!r} is not installed, using json")
+        name = "json"
+    if name not in CODECS:
+        raise ValueError(f"Unknown cache codec: {name}")
+    return CODECS[name]()
+
+
+# Frame markers. Unframed values, such as INCR counters and entries written
+# before framing, never start with these bytes and are passed through.
+_PLAIN = b"\x00"
+_ZLIB = b"\x01"
+_ZSTD = b"\x02"
+
+
+class Compressor:
+    """Frames stored bytes, compressing those of at least `min_bytes`."""
+
+    def __init__(self, algorithm: str = "zlib", min_bytes: int = 1024, level: Optional[int] = None):
+        if algorithm == "zstd" and zstandard is None:
+            print("Cache compression 'zstd' is not installed, using zlib")
+            algorithm = "zlib"
+        if algorithm not in ("none", "zlib", "zstd"):
+            raise ValueError(f"Unknown cache compression: {algorithm}")
+        self.algorithm = algorithm
+        self.min_bytes = min_bytes
+        if algorithm == "zstd":
+            self._zstd_compressor = zstandard.ZstdCompressor(level=level or 3)
+        self.level = 6 if level is None else level
+
+    def compress(self, data: bytes) -> bytes:
+        if self.algorithm == "none" or len(data) < self.min_bytes:
+            return _PLAIN + data
+        if self.algorithm == "zstd":
+            return _ZSTD + self._zstd_compressor.compress(data)
+        return _ZLIB + zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes) -> bytes:
+        marker, payload = data[:1], data[1:]
+        if marker == _PLAIN:
+            return payload
+        if marker == _ZLIB:
+            return zlib.decompress(payload)
+        if marker == _ZSTD:
+            if zstandard is None:
+                raise ValueError("zstd-compressed cache entry but zstandard is not installed")
+            return zstandard.ZstdDecompressor().decompress(payload)
+        return data
@@ -0,0 +1,97 @@
+import asyncio
+import os
+import re
+import time
+from typing import Iterable, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.services.images import FORMATS, VARIANTS, variant_filename
+from app.services.s3 import storage
+from app.services.uploads import count_references
+
+# Shared files that no Image row owns
+PROTECTED_FILENAMES = {"placeholder.png"}
+
+_VARIANT_NAME = re.compile(r"^(?P<stem>.+)\.(?:%s)\.[a-z]+$" % "|".join(VARIANTS))
+
+
+def stored_filename(image_url: Optional[str]) -> Optional[str]:
+    """The stored object behind an image URL; None for external URLs and shared files."""
+    key = storage.key_from_url(image_url)
+    if key is None or key in PROTECTED_FILENAMES:
+        return None
+    return key
+
+
+def storage_key_of(filename: str) -> Optional[str]:
+    """
+    The storage key a stored file belongs to, for originals, their
+    variants and precompressed copies. None for files that belong to no
+    key: shared files, dotfiles and partial writes.
+    """
+    if filename in PROTECTED_FILENAMES or filename.startswith(".") or filename.endswith(".part"):
+        return None
+    for suffix in (".br", ".gz"):
+        if filename.endswith(suffix):
+            filename = filename[:-len(suffix)]
+    match = _VARIANT_NAME.match(filename)
+    if match:
+        return match.group("stem")
+    return os.path.splitext(filename)[0]
+
+
+def blob_filenames(filename: str) -> List[str]:
+    """A stored original and every variant rendered from it."""
+    stem = os.path.splitext(filename)[0]
+    return [filename] + [
+        variant_filename(stem, variant, fmt)
+        for variant in VARIANTS
+        for fmt in FORMATS
+    ]
+
+
+def is_idle(filename: str, grace_seconds: float, now: Optional[float] = None) -> bool:
+    """True if a stored file is gone or has not been touched for `grace_seconds`."""
+    stored = storage.stat(filename)
+    if stored is None:
+        return True
+    return stored.modified <= (now or time.time()) - grace_seconds
+
+
+def _remove_idle_blob(filename: str, grace_seconds: float) -> bool:
+    if not is_idle(filename, grace_seconds):
+        return False
+    storage.delete(blob_filenames(filename))
+    return True
+
+
+async def collect_image_files(
+    db: AsyncSession,
+    filenames: Iterable[str],
+    grace_seconds: Optional[float] = None,
+) -> List[str]:
+    """
+    Delete stored images, with their variants, that no Image row references
+    any longer. A blob touched within the grace period is kept, since an
+    upload in flight may be about to reference it; the reconciliation in
+    gc_images.py picks it up later.
+
+    Returns the filenames that were removed.
+    """
+    grace_seconds = settings.IMAGE_GC_GRACE_SECONDS if grace_seconds is None else grace_seconds
+    filenames_by_key = {
+        storage_key_of(filename): filename
+        for filename in filenames
+        if filename not in PROTECTED_FILENAMES
+    }
+    filenames_by_key.pop(None, None)
+    references = await count_references(db, filenames_by_key)
+    orphans = [filename for key, filename in filenames_by_key.items() if not references[key]]
+    removed = await asyncio.gather(*[
+        run_in_threadpool(_remove_idle_blob, filename, grace_seconds)
+        for filename in orphans
+    ])
+    return [filename for filename, was_removed in zip(orphans, removed) if was_removed]
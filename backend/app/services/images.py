@@ -0,0 +1,168 @@
+import asyncio
+import os
+import tempfile
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from mimetypes import guess_type
+from typing import Dict, List, Optional
+
+from PIL import Image as PILImage, ImageOps, UnidentifiedImageError
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.services.s3 import storage
+
+# Longest edge in pixels and quality of every derived variant. Browse cards
+# use "card", the item page "detail", and zoom/lightbox views "full".
+VARIANTS = {
+    "card": {"max_size": 400, "quality": 75},
+    "detail": {"max_size": 1024, "quality": 80},
+    "full": {"max_size": 2048, "quality": 85},
+}
+
+# Each variant is written in both formats; WebP is roughly a third smaller,
+# JPEG is the fallback for clients without WebP support
+FORMATS = {
+    "webp": {"format": "WEBP", "options": {"method": 4}},
+    "jpeg": {"format": "JPEG", "options": {"optimize": True, "progressive": True}},
+}
+
+_EXTENSIONS = {"webp": ".webp", "jpeg": ".jpg"}
+
+# Raised by Pillow for files it cannot decode; rendering them again would fail the same way
+UNREADABLE_IMAGE_ERRORS = (UnidentifiedImageError, PILImage.DecompressionBombError)
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=settings.IMAGE_PROCESS_WORKERS or None)
+    return _pool
+
+
+def shutdown_pool() -> None:
+    """Stop the worker processes; a later call to `derive_variants` starts new ones."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def variant_filename(stem: str, variant: str, fmt: str) -> str:
+    return f"{stem}.{variant}{_EXTENSIONS[fmt]}"
+
+
+def _render_variants(source_path: str, stem: str, output_dir: str) -> Optional[Dict[str, Dict[str, str]]]:
+    # Runs in a worker process: decode once, then downscale progressively
+    # from the largest variant to the smallest. Returns the filename of
+    # each variant by format, or None if the file cannot be decoded.
+    try:
+        original = PILImage.open(source_path)
+        original.load()
+    except UNREADABLE_IMAGE_ERRORS:
+        return None
+    except OSError as e:
+        # Pillow reports truncated or corrupt data as a bare OSError without
+        # an errno; real I/O errors (missing file, EIO, ...) carry one
+        if e.errno is not None:
+            raise
+        return None
+    with original:
+        # Apply the EXIF orientation, since the metadata itself is dropped
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "L"):
+            background = PILImage.new("RGB", image.size, (255, 255, 255))
+            rgba = image.convert("RGBA")
+            background.paste(rgba, mask=rgba.getchannel("A"))
+            image = background
+        elif image.mode == "L":
+            image = image.convert("RGB")
+        
+        variants = {}
+        for variant, spec in sorted(VARIANTS.items(), key=lambda entry: -entry[1]["max_size"]):
+            image.thumbnail((spec["max_size"], spec["max_size"]), PILImage.LANCZOS)
+            variants[variant] = {}
+            for fmt, options in FORMATS.items():
+                filename = variant_filename(stem, variant, fmt)
+                path = os.path.join(output_dir, filename)
+                partial_path = f"{path}.{uuid.uuid4().hex}.part"
+                # No exif= argument, so no metadata (GPS position included) is written
+                image.save(partial_path, options["format"], quality=spec["quality"], **options["options"])
+                os.replace(partial_path, path)
+                variants[variant][fmt] = filename
+        return variants
+
+
+def _existing_variants(stem: str) -> Optional[Dict[str, Dict[str, str]]]:
+    variants = {}
+    for variant in VARIANTS:
+        variants[variant] = {}
+        for fmt in FORMATS:
+            filename = variant_filename(stem, variant, fmt)
+            if storage.stat(filename) is None:
+                return None
+            variants[variant][fmt] = filename
+    return variants
+
+
+async def _render_remote(key: str, stem: str) -> Optional[Dict[str, Dict[str, str]]]:
+    # Backends without local files: render from a downloaded copy, then
+    # upload the variants
+    loop = asyncio.get_running_loop()
+    with tempfile.TemporaryDirectory() as work_dir:
+        source_path = os.path.join(work_dir, key)
+        await run_in_threadpool(storage.download, key, source_path)
+        filenames = await loop.run_in_executor(_get_pool(), _render_variants, source_path, stem, work_dir)
+        if filenames is None:
+            return None
+        await asyncio.gather(*[
+            run_in_threadpool(storage.put_file, os.path.join(work_dir, filename), filename, guess_type(filename)[0])
+            for by_format in filenames.values()
+            for filename in by_format.values()
+        ])
+    return filenames
+
+
+async def derive_variants(key: str) -> Optional[Dict[str, Dict[str, str]]]:
+    """
+    Render the card, detail and full variants of a stored image in the
+    process pool and store them next to the original. Stored images are
+    named by content, so variants already stored for an image are reused
+    as they are.
+
+    Returns the URL of each variant by format, or None if the object is
+    not an image Pillow can read. Any other failure, such as a storage
+    error, is raised so the job rendering it is retried.
+    """
+    stem = os.path.splitext(key)[0]
+    filenames = await run_in_threadpool(_existing_variants, stem)
+    if not filenames:
+        local_path = storage.local_path(key)
+        if local_path is None:
+            filenames = await _render_remote(key, stem)
+        else:
+            # Rendered straight into the storage directory
+            loop = asyncio.get_running_loop()
+            filenames = await loop.run_in_executor(
+                _get_pool(), _render_variants, local_path, stem, storage.directory
+            )
+    if filenames is None:
+        print(f"Image variant generation skipped for {key}: not an image Pillow can read")
+        return None
+    return {
+        variant: {fmt: storage.url(filename) for fmt, filename in by_format.items()}
+        for variant, by_format in filenames.items()
+    }
+
+
+async def derive_variants_many(keys: List[Optional[str]]) -> List[Optional[Dict[str, Dict[str, str]]]]:
+    """
+    Derive variants for several stored images in parallel, once per
+    distinct key; None keys are skipped.
+    """
+    unique_keys = list(dict.fromkeys(key for key in keys if key))
+    derived = await asyncio.gather(*[derive_variants(key) for key in unique_keys])
+    variants_by_key = dict(zip(unique_keys, derived))
+    return [variants_by_key.get(key) if key else None for key in keys]
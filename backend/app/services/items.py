@@ -0,0 +1,130 @@
+from typing import Dict, Iterable, List
+
+from sqlalchemy import JSON, func, literal_column, select, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_dialect_name
+from app.models.models import Image, Item, Tag, User, item_tag
+
+# Columns of an item card, in response order
+ITEM_COLUMNS = (
+    Item.id,
+    Item.title,
+    Item.description,
+    Item.category,
+    Item.type,
+    Item.size,
+    Item.condition,
+    Item.point_value,
+    Item.user_id,
+    Item.status,
+    Item.is_approved,
+    Item.created_at,
+    Item.updated_at,
+)
+
+IMAGE_FIELDS = {
+    "id": Image.id,
+    "image_url": Image.image_url,
+    "is_primary": Image.is_primary,
+    "item_id": Image.item_id,
+    "variants": Image.variants,
+    "created_at": Image.created_at,
+}
+
+# Owner columns, labelled so they don't clash with the item's own
+USER_COLUMNS = (
+    User.id.label("owner_id"),
+    User.username.label("owner_username"),
+    User.profile_picture.label("owner_profile_picture"),
+)
+
+
+def _json_object(dialect_name: str, fields: dict):
+    # Keys are inlined: Postgres cannot infer the type of bound json_build_object keys
+    args = []
+    for key, value in fields.items():
+        args.extend([literal_column(f"'{key}'"), value])
+    if dialect_name == "postgresql":
+        return func.json_build_object(*args)
+    return func.json_object(*args)
+
+
+def _json_array_agg(dialect_name: str, value):
+    if dialect_name == "postgresql":
+        return func.coalesce(func.json_agg(value), literal_column("'[]'::json"))
+    return func.json_group_array(value)
+
+
+def images_column(dialect_name: str):
+    """Correlated subquery returning an item's images as a JSON array."""
+    fields = IMAGE_FIELDS
+    if dialect_name == "sqlite":
+        # JSON columns are stored as text; json() nests them as objects, not strings
+        fields = {**IMAGE_FIELDS, "variants": func.json(Image.variants)}
+    subquery = (
+        select(_json_array_agg(dialect_name, _json_object(dialect_name, fields)))
+        .where(Image.item_id == Item.id)
+        .scalar_subquery()
+    )
+    return type_coerce(subquery, JSON).label("images")
+
+
+def tags_column(dialect_name: str):
+    """Correlated subquery returning an item's tag names as a JSON array."""
+    subquery = (
+        select(_json_array_agg(dialect_name, Tag.name))
+        .select_from(item_tag.join(Tag, Tag.id == item_tag.c.tag_id))
+        .where(item_tag.c.item_id == Item.id)
+        .scalar_subquery()
+    )
+    return type_coerce(subquery, JSON).label("tags")
+
+
+def select_items(dialect_name: str, with_user: bool = False):
+    """
+    Select item cards as plain rows: the item columns plus its images and tags
+    aggregated in SQL, and optionally the owner. Callers add their own filters,
+    ordering and extra columns; rows are turned into dicts by `row_to_item`.
+    """
+    query = select(
+        *ITEM_COLUMNS,
+        images_column(dialect_name),
+        tags_column(dialect_name)
+    ).select_from(Item)
+    if with_user:
+        query = query.add_columns(*USER_COLUMNS).outerjoin(User, User.id == Item.user_id)
+    return query
+
+
+def row_to_item(row) -> dict:
+    """Convert a row selected by `select_items` into an Item response dict."""
+    mapping = row._mapping
+    item_dict = {column.key: mapping[column.key] for column in ITEM_COLUMNS}
+    item_dict["images"] = sorted(mapping["images"] or [], key=lambda image: image["id"])
+    item_dict["tags"] = mapping["tags"] or []
+    item_dict["user"] = None
+    if "owner_id" in mapping and mapping["owner_id"] is not None:
+        item_dict["user"] = {
+            "id": mapping["owner_id"],
+            "username": mapping["owner_username"],
+            "profile_picture": mapping["owner_profile_picture"],
+        }
+    return item_dict
+
+
+async def fetch_items(db: AsyncSession, query) -> List[dict]:
+    """Execute a `select_items` query and return the response dicts."""
+    result = await db.execute(query)
+    return [row_to_item(row) for row in result]
+
+
+async def fetch_items_by_ids(
+    db: AsyncSession, item_ids: Iterable[int], with_user: bool = False
+) -> Dict[int, dict]:
+    """Load item cards for the given ids in one query, keyed by id."""
+    item_ids = {item_id for item_id in item_ids if item_id is not None}
+    if not item_ids:
+        return {}
+    query = select_items(get_dialect_name(db), with_user=with_user).where(Item.id.in_(item_ids))
+    return {item["id"]: item for item in await fetch_items(db, query)}
@@ -0,0 +1,243 @@
+import asyncio
+import importlib
+import os
+import random
+import secrets
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import and_, delete, event, or_, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, get_dialect_name
+from app.models.models import Job
+
+Handler = Callable[[AsyncSession, Dict[str, Any]], Awaitable[None]]
+
+# Modules that register handlers; imported when a worker starts
+HANDLER_MODULES = ("app.api.jobs",)
+
+_handlers: Dict[str, Handler] = {}
+_workers: Set["JobWorker"] = set()
+
+# Session.info flag set by `enqueue`, so a commit can wake local workers
+_ENQUEUED = "jobs_enqueued"
+
+
+def job_handler(kind: str):
+    """
+    Register the coroutine that runs jobs of `kind`. It is called with its
+    own session and the job payload, and may run more than once for the
+    same job (a retry, or a worker lost mid-job), so it must be idempotent.
+    """
+    def decorator(handler: Handler) -> Handler:
+        _handlers[kind] = handler
+        return handler
+    return decorator
+
+
+def load_handlers() -> None:
+    for module in HANDLER_MODULES:
+        importlib.import_module(module)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue(
+    db: AsyncSession,
+    kind: str,
+    payload: Dict[str, Any],
+    delay: float = 0,
+    max_attempts: Optional[int] = None,
+) -> Job:
+    """
+    Add a job to the caller's session. It is committed with the caller's
+    own writes, and so is never run for a transaction that rolled back.
+    """
+    job = Job(
+        kind=kind,
+        payload=payload,
+        status="queued",
+        attempts=0,
+        max_attempts=max_attempts or settings.JOB_MAX_ATTEMPTS,
+        run_at=_now() + timedelta(seconds=delay),
+    )
+    db.add(job)
+    db.info[_ENQUEUED] = True
+    return job
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_workers(session: Session) -> None:
+    # Start new jobs right away rather than at the next poll
+    if session.info.pop(_ENQUEUED, False):
+        for worker in _workers:
+            worker.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_enqueued(session: Session) -> None:
+    session.info.pop(_ENQUEUED, None)
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter, so a shared failure is not retried in lockstep."""
+    delay = min(settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), settings.JOB_RETRY_MAX_SECONDS)
+    return random.uniform(delay / 2, delay)
+
+
+async def claim_jobs(db: AsyncSession, worker_id: str, limit: int) -> List[Row]:
+    """
+    Mark up to `limit` due jobs as running for `worker_id` and return them.
+
+    On Postgres the candidate rows are locked with SKIP LOCKED, so workers
+    never wait on each other or claim the same job. SQLite has no row locks;
+    the claim is a single UPDATE, which SQLite serializes behind its write
+    lock. Jobs whose lease has run out are claimed again.
+    """
+    now = _now()
+    due = or_(
+        and_(Job.status == "queued", Job.run_at <= now),
+        and_(Job.status == "running", Job.locked_at < now - timedelta(seconds=settings.JOB_LEASE_SECONDS)),
+    )
+    candidates = select(Job.id).where(due).order_by(Job.run_at).limit(limit)
+    if get_dialect_name(db) == "postgresql":
+        candidates = candidates.with_for_update(skip_locked=True)
+
+    result = await db.execute(
+        update(Job)
+        .where(Job.id.in_(candidates.scalar_subquery()))
+        .values(status="running", locked_at=now, locked_by=worker_id, attempts=Job.attempts + 1)
+        .returning(Job.id, Job.kind, Job.payload, Job.attempts, Job.max_attempts)
+        .execution_options(synchronize_session=False)
+    )
+    claimed = result.all()
+    await db.commit()
+    return claimed
+
+
+class JobWorker:
+    """
+    Runs queued jobs on up to `concurrency` tasks in this process.
+
+    Due jobs are claimed in batches as slots free up; the queue is polled
+    every `poll_interval` seconds, or sooner when a local transaction
+    enqueues work. A failed job is retried with backoff until it runs out
+    of attempts and is left as "failed" with its last error.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSessionLocal,
+        concurrency: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+    ):
+        self.session_factory = session_factory
+        self.concurrency = concurrency or settings.JOB_WORKERS or 1
+        self.poll_interval = poll_interval or settings.JOB_POLL_INTERVAL
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop_task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+
+    def wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        load_handlers()
+        self._wakeup = asyncio.Event()
+        self._loop_task = asyncio.create_task(self._poll())
+        _workers.add(self)
+
+    async def stop(self, timeout: float = 10) -> None:
+        """Stop claiming and give running jobs `timeout` seconds to finish.
+        Jobs cut off here are rerun once their lease runs out."""
+        _workers.discard(self)
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            await asyncio.gather(self._loop_task, return_exceptions=True)
+            self._loop_task = None
+        if self._running:
+            _, pending = await asyncio.wait(self._running, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def drain(self) -> int:
+        """Run due jobs until none are left; returns how many were run."""
+        load_handlers()
+        total = 0
+        while True:
+            claimed = await self._claim(self.concurrency)
+            if not claimed:
+                return total
+            await asyncio.gather(*[self._run(job) for job in claimed])
+            total += len(claimed)
+
+    async def _claim(self, limit: int) -> List[Row]:
+        try:
+            async with self.session_factory() as session:
+                return await claim_jobs(session, self.worker_id, limit)
+        except Exception as e:
+            print(f"Job claim error: {e}")
+            return []
+
+    async def _poll(self) -> None:
+        while True:
+            self._wakeup.clear()
+            free = self.concurrency - len(self._running)
+            if free > 0:
+                for job in await self._claim(free):
+                    task = asyncio.create_task(self._run(job))
+                    self._running.add(task)
+                    task.add_done_callback(self._finished)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        self.wake()
+
+    async def _run(self, job: Row) -> None:
+        handler = _handlers.get(job.kind)
+        try:
+            if handler is None:
+                raise LookupError(f"no handler registered for {job.kind!r}")
+            async with self.session_factory() as session:
+                await handler(session, job.payload)
+                await session.execute(delete(Job).where(Job.id == job.id))
+                await session.commit()
+        except Exception as e:
+            print(f"Job {job.id} ({job.kind}) error: {e}")
+            await self._fail(job, e)
+
+    async def _fail(self, job: Row, error: Exception) -> None:
+        values = {
+            "locked_at": None,
+            "locked_by": None,
+            "last_error": f"{type(error).__name__}: {error}"[:1000],
+        }
+        if job.attempts >= job.max_attempts:
+            values["status"] = "failed"
+        else:
+            values["status"] = "queued"
+            values["run_at"] = _now() + timedelta(seconds=retry_delay(job.attempts))
+        try:
+            async with self.session_factory() as session:
+                await session.execute(update(Job).where(Job.id == job.id).values(**values))
+                await session.commit()
+        except Exception as e:
+            # The lease expiring reruns the job
+            print(f"Job {job.id} ({job.kind}) reschedule error: {e}")
+
+
+job_worker = JobWorker()
@@ -0,0 +1,182 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+Value = Union[bytes, str, int, float]
+
+# Deletes KEYS[1] only if it still holds ARGV[1], atomically; RedisService
+# releases locks with it so an expired lock taken over by another worker is
+# left alone
+COMPARE_AND_DELETE = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class MemoryRedis:
+    """
+    In-process stand-in for the subset of `redis.asyncio.Redis` used by
+    RedisService, for deployments without a Redis server.
+
+    Keys set with an expiry are bounded by entry count and total size and
+    evicted least recently used first. Keys without one, such as namespace
+    counters, are never evicted (like Redis' volatile-lru policy), because
+    losing a counter would resurrect entries of an older generation.
+    Values are stored as bytes, as Redis would return them.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._volatile: "OrderedDict[str, Tuple[bytes, float]]" = OrderedDict()
+        self._persistent: Dict[str, bytes] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _encode(value: Value) -> bytes:
+        if isinstance(value, bytes):
+            return value
+        return str(value).encode()
+
+    def _lookup(self, key: str) -> Optional[bytes]:
+        if key in self._persistent:
+            return self._persistent[key]
+        entry = self._volatile.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._volatile.move_to_end(key)
+        return value
+
+    def _remove(self, key: str) -> bool:
+        if self._persistent.pop(key, None) is not None:
+            return True
+        entry = self._volatile.pop(key, None)
+        if entry is None:
+            return False
+        self._bytes -= len(entry[0])
+        return True
+
+    def _store(self, key: str, value: bytes, ttl: Optional[float]) -> None:
+        self._remove(key)
+        if ttl is None:
+            self._persistent[key] = value
+            return
+        self._volatile[key] = (value, time.monotonic() + ttl)
+        self._bytes += len(value)
+        while self._volatile and (
+            len(self._volatile) > self.max_entries or self._bytes > self.max_bytes
+        ):
+            self._remove(next(iter(self._volatile)))
+            self.evictions += 1
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = self._lookup(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def mget(self, keys: List[str]) -> List[Optional[bytes]]:
+        return [await self.get(key) for key in keys]
+
+    async def set(
+        self,
+        key: str,
+        value: Value,
+        ex: Optional[float] = None,
+        px: Optional[float] = None,
+        nx: bool = False,
+    ) -> Optional[bool]:
+        if nx and self._lookup(key) is not None:
+            return None
+        ttl = ex if ex is not None else (px / 1000 if px is not None else None)
+        self._store(key, self._encode(value), ttl)
+        return True
+
+    async def incr(self, key: str) -> int:
+        value = int(self._lookup(key) or 0) + 1
+        # INCR keeps an existing expiry; counters here never have one
+        entry = self._volatile.get(key)
+        ttl = entry[1] - time.monotonic() if entry else None
+        self._store(key, self._encode(value), ttl)
+        return value
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self._remove(key) for key in keys)
+
+    def register_script(self, script: str):
+        """Lua cannot run here; the scripts RedisService registers are emulated."""
+        if script != COMPARE_AND_DELETE:
+            raise NotImplementedError("MemoryRedis only runs COMPARE_AND_DELETE")
+        return self._compare_and_delete
+
+    async def _compare_and_delete(self, keys: List[str], args: List[Value]) -> int:
+        # No await between the check and the delete, so nothing can interleave
+        if self._lookup(keys[0]) != self._encode(args[0]):
+            return 0
+        return int(self._remove(keys[0]))
+
+    async def publish(self, channel: str, message: Any) -> int:
+        # Every reader shares this process's memory, so nobody needs telling
+        return 0
+
+    async def flushall(self) -> bool:
+        self._volatile.clear()
+        self._persistent.clear()
+        self._bytes = 0
+        return True
+
+    def pipeline(self, transaction: bool = True) -> "MemoryPipeline":
+        return MemoryPipeline(self)
+
+    async def close(self, close_connection_pool: Optional[bool] = None) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._volatile) + len(self._persistent),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class MemoryPipeline:
+    """Queues commands and runs them on `execute()`, like a non-transactional pipeline."""
+
+    def __init__(self, client: MemoryRedis):
+        self._client = client
+        self._commands: List[Any] = []
+
+    async def __aenter__(self) -> "MemoryPipeline":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        self._commands = []
+
+    def set(self, *args: Any, **kwargs: Any) -> "MemoryPipeline":
+        self._commands.append((self._client.set, args, kwargs))
+        return self
+
+    def incr(self, *args: Any, **kwargs: Any) -> "MemoryPipeline":
+        self._commands.append((self._client.incr, args, kwargs))
+        return self
+
+    async def execute(self) -> List[Any]:
+        commands, self._commands = self._commands, []
+        return [await command(*args, **kwargs) for command, args, kwargs in commands]
@@ -1,77 +1,289 @@
+import asyncio
 import json
 import os
-from typing import Any, Optional, Union, Dict
-import redis
+import secrets
+from typing import Any, Dict, Iterable, List, Optional
+from redis import asyncio as aioredis
 from dotenv import load_dotenv
 
+from app.core.config import settings
+from app.services.codecs import Compressor, get_codec
+from app.services.local_cache import LocalCache
+from app.services.memory_redis import COMPARE_AND_DELETE, MemoryRedis
+
 # Load environment variables
 load_dotenv()
 
 REDIS_URL = os.getenv("REDIS_URL")
 
+# Every worker drops the keys published here from its local tier
+INVALIDATION_CHANNEL = "cache:invalidate"
+
 class RedisService:
-    """Service for Redis caching"""
+    """
+    Service for Redis caching.
+    
+    Raw reads go through a bounded in-process tier first; deletes and
+    namespace bumps are broadcast on INVALIDATION_CHANNEL so every worker
+    drops its local copy. The local TTL bounds staleness if a message is
+    missed.
+    
+    Values are encoded with the configured codec and compressed on the way
+    to Redis; the local tier keeps them uncompressed.
+    
+    Without REDIS_URL, an in-process MemoryRedis takes Redis' place and is
+    the only tier, so single-node deployments still get caching.
+    """
     
     def __init__(self):
-        self.redis_client = redis.from_url(REDIS_URL) if REDIS_URL else None
+        self._listener: Optional[asyncio.Task] = None
+        self.codec = get_codec(settings.CACHE_CODEC)
+        if REDIS_URL:
+            # Connections are opened lazily, so this is safe at import time
+            pool = aioredis.ConnectionPool.from_url(
+                REDIS_URL,
+                max_connections=settings.REDIS_MAX_CONNECTIONS,
+                socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+                socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+            )
+            self.redis_client = aioredis.Redis(connection_pool=pool)
+            self.local = LocalCache(
+                max_entries=settings.CACHE_LOCAL_MAX_ENTRIES,
+                max_bytes=settings.CACHE_LOCAL_MAX_BYTES,
+                ttl=settings.CACHE_LOCAL_TTL,
+            )
+            self.compressor = Compressor(settings.CACHE_COMPRESSION, settings.CACHE_COMPRESS_MIN_BYTES)
+        else:
+            self.redis_client = MemoryRedis(
+                max_entries=settings.CACHE_LOCAL_MAX_ENTRIES,
+                max_bytes=settings.CACHE_LOCAL_MAX_BYTES,
+            )
+            # Already in memory: no second tier and nothing to compress
+            self.local = LocalCache(max_entries=0, max_bytes=0, ttl=0)
+            self.compressor = Compressor("none")
+        self._compare_and_delete = self.redis_client.register_script(COMPARE_AND_DELETE)
+    
+    async def start(self) -> None:
+        """Start listening for invalidations from other workers"""
+        if self.redis_client and self.local.enabled and self._listener is None:
+            self._listener = asyncio.create_task(self._listen_invalidations())
+    
+    async def close(self) -> None:
+        """Stop the invalidation listener and close all pooled connections"""
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        if self.redis_client:
+            await self.redis_client.close(close_connection_pool=True)
+    
+    async def _listen_invalidations(self) -> None:
+        # Pub/sub blocks between messages, so it gets its own connection
+        # without the pool's socket timeout
+        client = aioredis.Redis.from_url(
+            REDIS_URL, socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT
+        )
+        try:
+            while True:
+                try:
+                    async with client.pubsub(ignore_subscribe_messages=True) as pubsub:
+                        await pubsub.subscribe(INVALIDATION_CHANNEL)
+                        # Anything published while we were not subscribed is lost
+                        self.local.clear()
+                        async for message in pubsub.listen():
+                            self.local.delete(*json.loads(message["data"]))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"Redis pubsub error: {e}")
+                    self.local.clear()
+                    await asyncio.sleep(1)
+        finally:
+            await client.close()
+    
+    async def _broadcast(self, keys: List[str]) -> None:
+        self.local.delete(*keys)
+        if self.local.enabled:
+            await self.redis_client.publish(INVALIDATION_CHANNEL, json.dumps(keys))
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit ratio and memory use of the in-process tier"""
+        return {
+            "backend": "memory" if isinstance(self.redis_client, MemoryRedis) else "redis",
+            "invalidation_listener": self._listener is not None and not self._listener.done(),
+            "codec": self.codec.name,
+            "compression": self.compressor.algorithm,
+            "local": self.local.stats(),
+            **({"memory": self.redis_client.stats()} if isinstance(self.redis_client, MemoryRedis) else {}),
+        }
         
-    def set(self, key: str, value: Any, expire_seconds: int = 3600) -> bool:
+    async def set(self, key: str, value: Any, expire_seconds: int = 3600) -> bool:
         """Set value in Redis cache with expiration"""
+        try:
+            encoded = self.codec.encode(value)
+        except Exception as e:
+            print(f"Redis set error: {e}")
+            return False
+        return await self.set_raw(key, encoded, expire_seconds)
+    
+    async def get(self, key: str) -> Optional[Any]:
+        """Get value from Redis cache"""
+        value = await self.get_raw(key)
+        if not value:
+            return None
+        try:
+            return self.codec.decode(value)
+        except Exception as e:
+            # Written by another codec; treat as a miss
+            print(f"Redis get error: {e}")
+            return None
+    
+    async def set_raw(self, key: str, value: bytes, expire_seconds: int = 3600) -> bool:
+        """Set pre-encoded bytes in Redis cache with expiration"""
         if not self.redis_client:
             return False
             
         try:
-            # Serialize value to JSON string
-            serialized_value = json.dumps(value)
-            self.redis_client.set(key, serialized_value, ex=expire_seconds)
+            await self.redis_client.set(key, self.compressor.compress(value), ex=expire_seconds)
+            self.local.set(key, value, expire_seconds)
             return True
         except Exception as e:
             print(f"Redis set error: {e}")
             return False
     
-    def get(self, key: str) -> Optional[Any]:
-        """Get value from Redis cache"""
+    async def get_raw(self, key: str, use_local: bool = True) -> Optional[bytes]:
+        """Get pre-encoded bytes, from memory if possible, without decoding them"""
         if not self.redis_client:
             return None
+        
+        if use_local:
+            value = self.local.get(key)
+            if value is not None:
+                return value
             
         try:
-            value = self.redis_client.get(key)
-            if value:
-                # Deserialize JSON string to Python object
-                return json.loads(value)
-            return None
+            value = await self.redis_client.get(key)
+            if value is not None:
+                value = self.compressor.decompress(value)
         except Exception as e:
             print(f"Redis get error: {e}")
             return None
+        if value is not None:
+            self.local.set(key, value)
+        return value
     
-    def delete(self, key: str) -> bool:
-        """Delete key from Redis cache"""
-        if not self.redis_client:
+    async def get_many_raw(self, keys: List[str]) -> List[Optional[bytes]]:
+        """Get several pre-encoded values, fetching local misses with one MGET"""
+        if not self.redis_client or not keys:
+            return [None] * len(keys)
+        
+        values = [self.local.get(key) for key in keys]
+        missing = [i for i, value in enumerate(values) if value is None]
+        if not missing:
+            return values
+            
+        try:
+            fetched = await self.redis_client.mget([keys[i] for i in missing])
+            fetched = [
+                self.compressor.decompress(value) if value is not None else None
+                for value in fetched
+            ]
+        except Exception as e:
+            print(f"Redis get error: {e}")
+            return values
+        for i, value in zip(missing, fetched):
+            if value is not None:
+                values[i] = value
+                self.local.set(keys[i], value)
+        return values
+    
+    async def set_many_raw(self, values: Dict[str, bytes], expire_seconds: int = 3600) -> bool:
+        """Set several pre-encoded values in one pipelined round trip"""
+        if not self.redis_client or not values:
+            return False
+            
+        try:
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for key, value in values.items():
+                    pipe.set(key, self.compressor.compress(value), ex=expire_seconds)
+                await pipe.execute()
+            for key, value in values.items():
+                self.local.set(key, value, expire_seconds)
+            return True
+        except Exception as e:
+            print(f"Redis set error: {e}")
+            return False
+    
+    async def delete(self, *keys: str) -> bool:
+        """Delete one or more keys with a single DEL and tell every worker"""
+        if not self.redis_client or not keys:
             return False
             
         try:
-            self.redis_client.delete(key)
+            await self.redis_client.delete(*keys)
+            await self._broadcast(list(keys))
             return True
         except Exception as e:
             print(f"Redis delete error: {e}")
             return False
     
-    def clear_pattern(self, pattern: str) -> bool:
-        """Clear all keys matching pattern"""
+    async def acquire_lock(self, name: str, ttl_ms: int) -> Optional[str]:
+        """
+        Try to take a short-lived lock shared by all workers with SET NX PX.
+        Returns a token for `release_lock`, or None if another holder has it.
+        Without Redis there is nobody to coordinate with, so it always succeeds.
+        """
+        token = secrets.token_hex(8)
+        if not self.redis_client:
+            return token
+            
+        try:
+            acquired = await self.redis_client.set(f"lock:{name}", token, px=ttl_ms, nx=True)
+            return token if acquired else None
+        except Exception as e:
+            print(f"Redis lock error: {e}")
+            # Fail open: rebuilding twice beats not rebuilding at all
+            return token
+    
+    async def release_lock(self, name: str, token: str) -> None:
+        """Release a lock taken by `acquire_lock` unless it already expired and changed hands"""
         if not self.redis_client:
+            return
+            
+        try:
+            # Checked and deleted in one script, so a lock that expired and
+            # was taken by another worker in between is never deleted
+            await self._compare_and_delete(keys=[f"lock:{name}"], args=[token])
+        except Exception as e:
+            print(f"Redis lock error: {e}")
+    
+    async def namespace_version(self, namespace: str) -> int:
+        """Get the current generation of a cache namespace"""
+        value = await self.get_raw(f"ns:{namespace}")
+        return int(value) if value else 0
+    
+    async def invalidate_namespaces(self, namespaces: Iterable[str]) -> bool:
+        """
+        Invalidate every key of the given namespaces with one INCR each,
+        pipelined into a single round trip. Keys of older generations are
+        never read again and expire by TTL.
+        """
+        namespaces = list(namespaces)
+        if not self.redis_client or not namespaces:
             return False
             
         try:
-            cursor = 0
-            while True:
-                cursor, keys = self.redis_client.scan(cursor, match=pattern, count=100)
-                if keys:
-                    self.redis_client.delete(*keys)
-                if cursor == 0:
-                    break
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for namespace in namespaces:
+                    pipe.incr(f"ns:{namespace}")
+                await pipe.execute()
+            await self._broadcast([f"ns:{namespace}" for namespace in namespaces])
             return True
         except Exception as e:
-            print(f"Redis clear_pattern error: {e}")
+            print(f"Redis invalidate error: {e}")
             return False
 
 # Singleton instance
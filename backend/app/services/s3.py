@@ -1 +1,311 @@
+import base64
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta
+from typing import BinaryIO, Dict, Iterable, Iterator, NamedTuple, Optional
 
+import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from jose import JWTError, jwt
+
+from app.core.config import settings
+
+# Local image directory, served under /static/images
+IMAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "static", "images")
+
+# Bytes held in memory per upload while hashing or copying
+CHUNK_SIZE = 256 * 1024
+
+# Objects are named by content, so they never change under the same key
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Issuer claim of the tokens behind local upload URLs
+_UPLOAD_TOKEN_TYPE = "upload"
+
+
+class StoredObject(NamedTuple):
+    key: str
+    size: int
+    modified: float     # POSIX timestamp of the last write or touch
+
+
+class LocalStorage:
+    """
+    Objects stored as files in a local directory and served by the API
+    under /static/images.
+
+    Presigned uploads are signed URLs to PUT /api/uploads/{key}, so in
+    this backend the bytes still pass through the API.
+    """
+
+    name = "local"
+
+    def __init__(self, directory: str = IMAGE_DIR, base_url: str = "/static/images"):
+        self.directory = directory
+        self.base_url = base_url.rstrip("/")
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    def key_from_url(self, url: Optional[str]) -> Optional[str]:
+        """The key of an object given its `url`; None for URLs this backend did not issue."""
+        prefix = self.base_url + "/"
+        if not url or not url.startswith(prefix):
+            return None
+        key = url[len(prefix):]
+        return key if key and "/" not in key else None
+
+    def local_path(self, key: str) -> Optional[str]:
+        return os.path.join(self.directory, key)
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        try:
+            stat_result = os.stat(os.path.join(self.directory, key))
+        except FileNotFoundError:
+            return None
+        return StoredObject(key, stat_result.st_size, stat_result.st_mtime)
+
+    def touch(self, key: str) -> bool:
+        """Mark an object as recently used; False if it does not exist."""
+        try:
+            os.utime(os.path.join(self.directory, key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def upload_file(self, file: BinaryIO, key: str, content_type: Optional[str] = None) -> bool:
+        """
+        Store the content of `file` under `key`, in bounded chunks. Returns
+        False, and only touches the object, if `key` is already stored.
+        """
+        if self.touch(key):
+            return False
+        path = os.path.join(self.directory, key)
+        os.makedirs(self.directory, exist_ok=True)
+        # Written under a temporary name so an object is never seen half-written
+        partial_path = f"{path}.{uuid.uuid4().hex}.part"
+        try:
+            file.seek(0)
+            with open(partial_path, "wb") as buffer:
+                shutil.copyfileobj(file, buffer, CHUNK_SIZE)
+            os.replace(partial_path, path)
+        except BaseException:
+            _remove_quietly(partial_path)
+            raise
+        return True
+
+    def put_file(self, path: str, key: str, content_type: Optional[str] = None) -> None:
+        """Move a local file, such as a rendered variant, into storage."""
+        shutil.move(path, os.path.join(self.directory, key))
+
+    def download(self, key: str, path: str) -> None:
+        """Copy an object to a local file."""
+        shutil.copyfile(os.path.join(self.directory, key), path)
+
+    def delete(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            _remove_quietly(os.path.join(self.directory, key))
+
+    def iter_objects(self) -> Iterator[StoredObject]:
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False):
+                    stat_result = entry.stat(follow_symlinks=False)
+                    yield StoredObject(entry.name, stat_result.st_size, stat_result.st_mtime)
+
+    def presign_upload(self, key: str, content_type: str, size: int, sha256: str) -> Dict[str, object]:
+        expires = datetime.utcnow() + timedelta(seconds=settings.UPLOAD_URL_EXPIRE_SECONDS)
+        token = jwt.encode(
+            {"typ": _UPLOAD_TOKEN_TYPE, "key": key, "size": size, "exp": expires},
+            settings.SECRET_KEY,
+            algorithm=settings.ALGORITHM,
+        )
+        return {
+            "method": "PUT",
+            "url": f"{settings.API_V1_STR}/uploads/{key}?token={token}",
+            "headers": {"Content-Type": content_type},
+        }
+
+    def verify_upload_token(self, token: str, key: str) -> Optional[int]:
+        """The size a local upload URL was issued for, or None if the token is invalid."""
+        try:
+            claims = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+        except JWTError:
+            return None
+        if claims.get("typ") != _UPLOAD_TOKEN_TYPE or claims.get("key") != key:
+            return None
+        return claims.get("size")
+
+
+class S3Storage:
+    """
+    Objects stored in an S3-compatible bucket (AWS S3, MinIO, ...).
+
+    Files are written with multipart uploads above the configured threshold.
+    Presigned uploads are PUT URLs that pin the content type, length and
+    SHA-256 checksum, so S3 itself rejects any other body.
+    """
+
+    name = "s3"
+
+    def __init__(
+        self,
+        bucket: str,
+        region: Optional[str] = None,
+        endpoint_url: Optional[str] = None,
+        public_url: Optional[str] = None,
+        client=None,
+    ):
+        self.bucket = bucket
+        self.client = client or boto3.client(
+            "s3",
+            region_name=region,
+            endpoint_url=endpoint_url,
+            config=Config(
+                signature_version="s3v4",
+                # MinIO and other stand-ins usually serve buckets by path
+                s3={"addressing_style": "path" if endpoint_url else "auto"},
+            ),
+        )
+        if not public_url:
+            if endpoint_url:
+                public_url = f"{endpoint_url.rstrip('/')}/{bucket}"
+            else:
+                public_url = f"https://{bucket}.s3.{region or 'us-east-1'}.amazonaws.com"
+        self.public_url = public_url.rstrip("/")
+        self.transfer = TransferConfig(
+            multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+            multipart_chunksize=settings.S3_MULTIPART_CHUNK_SIZE,
+        )
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{key}"
+
+    def key_from_url(self, url: Optional[str]) -> Optional[str]:
+        prefix = self.public_url + "/"
+        if not url or not url.startswith(prefix):
+            return None
+        key = url[len(prefix):]
+        return key if key and "/" not in key else None
+
+    def local_path(self, key: str) -> Optional[str]:
+        return None
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return StoredObject(key, head["ContentLength"], head["LastModified"].timestamp())
+
+    def touch(self, key: str) -> bool:
+        # S3 has no utime; copying an object onto itself renews LastModified
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+        self.client.copy_object(
+            Bucket=self.bucket,
+            Key=key,
+            CopySource={"Bucket": self.bucket, "Key": key},
+            MetadataDirective="REPLACE",
+            ContentType=head.get("ContentType", "binary/octet-stream"),
+            CacheControl=IMMUTABLE_CACHE_CONTROL,
+        )
+        return True
+
+    def _extra_args(self, content_type: Optional[str]) -> Dict[str, str]:
+        extra_args = {"CacheControl": IMMUTABLE_CACHE_CONTROL}
+        if content_type:
+            extra_args["ContentType"] = content_type
+        return extra_args
+
+    def upload_file(self, file: BinaryIO, key: str, content_type: Optional[str] = None) -> bool:
+        if self.touch(key):
+            return False
+        file.seek(0)
+        self.client.upload_fileobj(
+            file, self.bucket, key, ExtraArgs=self._extra_args(content_type), Config=self.transfer
+        )
+        return True
+
+    def put_file(self, path: str, key: str, content_type: Optional[str] = None) -> None:
+        self.client.upload_file(
+            path, self.bucket, key, ExtraArgs=self._extra_args(content_type), Config=self.transfer
+        )
+        _remove_quietly(path)
+
+    def download(self, key: str, path: str) -> None:
+        self.client.download_file(self.bucket, key, path, Config=self.transfer)
+
+    def delete(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        # DeleteObjects takes at most 1000 keys
+        for start in range(0, len(keys), 1000):
+            self.client.delete_objects(
+                Bucket=self.bucket,
+                Delete={"Objects": [{"Key": key} for key in keys[start:start + 1000]], "Quiet": True},
+            )
+
+    def iter_objects(self) -> Iterator[StoredObject]:
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket):
+            for entry in page.get("Contents", []):
+                yield StoredObject(entry["Key"], entry["Size"], entry["LastModified"].timestamp())
+
+    def presign_upload(self, key: str, content_type: str, size: int, sha256: str) -> Dict[str, object]:
+        checksum = base64.b64encode(bytes.fromhex(sha256)).decode()
+        url = self.client.generate_presigned_url(
+            "put_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": key,
+                "ContentType": content_type,
+                "ContentLength": size,
+                "ChecksumSHA256": checksum,
+                "CacheControl": IMMUTABLE_CACHE_CONTROL,
+            },
+            ExpiresIn=settings.UPLOAD_URL_EXPIRE_SECONDS,
+        )
+        # Every one of these is signed and must be sent as given
+        return {
+            "method": "PUT",
+            "url": url,
+            "headers": {
+                "Content-Type": content_type,
+                "Content-Length": str(size),
+                "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+                "x-amz-checksum-sha256": checksum,
+            },
+        }
+
+
+def _remove_quietly(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def get_storage():
+    """The storage backend selected by STORAGE_BACKEND."""
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage(
+            bucket=settings.S3_BUCKET,
+            region=settings.S3_REGION,
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            public_url=settings.S3_PUBLIC_URL,
+        )
+    return LocalStorage()
+
+
+storage = get_storage()
+# Name used by older callers
+s3_service = storage
@@ -0,0 +1,69 @@
+import re
+from typing import Optional
+
+from sqlalchemy import column, literal_column, table, func
+
+from app.models.models import Item
+
+# Virtual table created by ITEM_SEARCH_DDL in app/models/models.py
+items_fts = table("items_fts", column("rowid"), column("rank"))
+
+# Must match the ix_items_search expression exactly for Postgres to use the index
+ITEM_TSVECTOR = literal_column(
+    "to_tsvector('english'::regconfig, coalesce(items.title, '') || ' ' || coalesce(items.description, ''))"
+)
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def search_tokens(search: Optional[str]) -> list:
+    """Split a user search string into plain word tokens."""
+    if not search:
+        return []
+    return _TOKEN_RE.findall(search.lower())
+
+
+def _fts5_query(tokens: list) -> str:
+    # Every token must match, each as a quoted prefix so FTS5 operators are never interpreted
+    return " ".join('"' + token.replace('"', '""') + '"*' for token in tokens)
+
+
+def _tsquery(tokens: list) -> str:
+    return " & ".join(token + ":*" for token in tokens)
+
+
+def apply_search(query, dialect_name: str, search: Optional[str], rank: bool = False):
+    """
+    Restrict an items query to rows matching `search`.
+
+    Uses the FTS5 table on SQLite and the GIN-indexed tsvector on Postgres, and
+    falls back to ILIKE for any other dialect, and for searches without a
+    single word (such as punctuation only), which the full-text indexes cannot
+    express. With `rank=True` the best matches are ordered first; callers add
+    their own tie-breaking order afterwards.
+    """
+    if not search:
+        return query
+    tokens = search_tokens(search)
+
+    if tokens and dialect_name == "sqlite":
+        query = query.join(items_fts, items_fts.c.rowid == Item.id).where(
+            literal_column("items_fts").op("MATCH")(_fts5_query(tokens))
+        )
+        if rank:
+            # FTS5 rank is bm25, where lower is better
+            query = query.order_by(items_fts.c.rank)
+        return query
+
+    if tokens and dialect_name == "postgresql":
+        tsquery = func.to_tsquery("english", _tsquery(tokens))
+        query = query.where(ITEM_TSVECTOR.op("@@")(tsquery))
+        if rank:
+            query = query.order_by(func.ts_rank(ITEM_TSVECTOR, tsquery).desc())
+        return query
+
+    search_term = f"%{search}%"
+    return query.where(
+        (Item.title.ilike(search_term)) |
+        (Item.description.ilike(search_term))
+    )
@@ -0,0 +1,107 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, List
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_dialect_name
+from app.models.models import Tag, item_tag
+
+# Upper bound on the tag name -> id mappings kept in memory
+MAX_CACHED_TAG_IDS = 4096
+
+# The app never deletes or renames tags, so a cached id stays valid; code
+# that does (scripts, tests resetting the database) must call clear_tag_ids()
+_tag_ids: "OrderedDict[str, int]" = OrderedDict()
+
+_UPSERTS = {
+    "postgresql": postgresql_insert,
+    "sqlite": sqlite_insert,
+}
+
+
+def normalize_tag_names(names: Iterable[str]) -> List[str]:
+    """Strip whitespace and drop empty and repeated names, keeping their order."""
+    return list(dict.fromkeys(name.strip() for name in names if name and name.strip()))
+
+
+def clear_tag_ids() -> None:
+    """Forget every cached tag id, after tags were deleted or renamed."""
+    _tag_ids.clear()
+
+
+def _remember(tag_ids: Dict[str, int]) -> None:
+    for name, tag_id in tag_ids.items():
+        _tag_ids[name] = tag_id
+        _tag_ids.move_to_end(name)
+    while len(_tag_ids) > MAX_CACHED_TAG_IDS:
+        _tag_ids.popitem(last=False)
+
+
+async def _select_tag_ids(db: AsyncSession, names: List[str]) -> Dict[str, int]:
+    result = await db.execute(select(Tag.name, Tag.id).where(Tag.name.in_(names)))
+    return dict(result.all())
+
+
+async def resolve_tag_ids(db: AsyncSession, names: Iterable[str]) -> Dict[str, int]:
+    """
+    Map tag names to ids, creating the missing tags.
+
+    Costs at most three statements however many names there are: one IN
+    query, one INSERT ... ON CONFLICT DO NOTHING RETURNING for the new
+    names, and one more IN query for names a concurrent request created
+    in the meantime. Only ids read back by SELECT are cached, never ones
+    this transaction just inserted and might still roll back.
+    """
+    names = normalize_tag_names(names)
+    tag_ids = {name: _tag_ids[name] for name in names if name in _tag_ids}
+    for name in tag_ids:
+        _tag_ids.move_to_end(name)
+    
+    missing = [name for name in names if name not in tag_ids]
+    if not missing:
+        return tag_ids
+    
+    found = await _select_tag_ids(db, missing)
+    _remember(found)
+    tag_ids.update(found)
+    
+    new_names = [name for name in missing if name not in found]
+    if not new_names:
+        return tag_ids
+    
+    upsert = _UPSERTS.get(get_dialect_name(db))
+    if upsert is None:
+        statement = insert(Tag)
+    else:
+        statement = upsert(Tag).on_conflict_do_nothing(index_elements=[Tag.name])
+    result = await db.execute(
+        statement.values([{"name": name} for name in new_names]).returning(Tag.name, Tag.id)
+    )
+    inserted = dict(result.all())
+    tag_ids.update(inserted)
+    
+    # Names that hit the unique constraint were created by someone else
+    conflicted = [name for name in new_names if name not in inserted]
+    if conflicted:
+        tag_ids.update(await _select_tag_ids(db, conflicted))
+    
+    return tag_ids
+
+
+async def add_item_tags(db: AsyncSession, item_id: int, names: Iterable[str]) -> None:
+    """Tag an item with `names`, creating missing tags, in a single executemany."""
+    tag_ids = await resolve_tag_ids(db, names)
+    if tag_ids:
+        await db.execute(
+            item_tag.insert(),
+            [{"item_id": item_id, "tag_id": tag_id} for tag_id in tag_ids.values()]
+        )
+
+
+async def replace_item_tags(db: AsyncSession, item_id: int, names: Iterable[str]) -> None:
+    """Replace all tags of an item with `names`."""
+    await db.execute(delete(item_tag).where(item_tag.c.item_id == item_id))
+    await add_item_tags(db, item_id, names)
@@ -0,0 +1,259 @@
+import asyncio
+import hashlib
+import re
+import tempfile
+from typing import AsyncIterator, BinaryIO, Dict, Iterable, List, NamedTuple, Optional
+
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.models.models import Image
+from app.services.s3 import CHUNK_SIZE, IMAGE_DIR, storage
+
+# Accepted image types, and the extension of their stored files
+CONTENT_TYPE_EXTENSIONS = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+    "image/gif": ".gif",
+}
+
+# Leading bytes of the accepted image types (WebP is checked separately)
+_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+_SHA256 = re.compile(r"^[0-9a-f]{64}$")
+_UPLOADED_KEY = re.compile(
+    r"^[0-9a-f]{64}(?:%s)$" % "|".join(re.escape(ext) for ext in set(CONTENT_TYPE_EXTENSIONS.values()))
+)
+
+
+class StoredUpload(NamedTuple):
+    """An upload saved under its content hash."""
+    storage_key: str    # hex SHA-256 of the content
+    filename: str       # storage_key plus the extension of its type; the object's key in storage
+    path: Optional[str] # local path, for backends that keep files on disk
+    created: bool       # False if identical content was already stored
+
+
+class _TooLarge(Exception):
+    pass
+
+
+def _file_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Each image must be at most {settings.MAX_UPLOAD_FILE_BYTES} bytes",
+    )
+
+
+def _unsupported_type() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        detail=f"Images must be one of: {', '.join(CONTENT_TYPE_EXTENSIONS)}",
+    )
+
+
+def _hash_file(file: BinaryIO, max_bytes: int) -> str:
+    digest = hashlib.sha256()
+    size = 0
+    file.seek(0)
+    for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+        size += len(chunk)
+        if size > max_bytes:
+            raise _TooLarge()
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _sniff_content_type(file: BinaryIO) -> Optional[str]:
+    file.seek(0)
+    head = file.read(12)
+    file.seek(0)
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    for signature, content_type in _SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    return None
+
+
+def storage_filename(storage_key: str, content_type: str) -> str:
+    # Named by type rather than by the client's filename, so the same
+    # content is always stored once under one name
+    return f"{storage_key}{CONTENT_TYPE_EXTENSIONS[content_type]}"
+
+
+async def upload_content_type(upload: UploadFile) -> str:
+    """
+    The image type of an upload: the one its first bytes identify, else
+    the declared one. Raises 415 for types outside CONTENT_TYPE_EXTENSIONS.
+    """
+    content_type = await run_in_threadpool(_sniff_content_type, upload.file)
+    if content_type is None and upload.content_type:
+        content_type = upload.content_type.split(";")[0].strip().lower()
+    if content_type not in CONTENT_TYPE_EXTENSIONS:
+        raise _unsupported_type()
+    return content_type
+
+
+async def hash_upload(upload: UploadFile, max_bytes: Optional[int] = None) -> str:
+    """
+    Return the SHA-256 of an upload, read in bounded chunks in the thread
+    pool. Raises 413 as soon as more than `max_bytes` have been read.
+    """
+    max_bytes = settings.MAX_UPLOAD_FILE_BYTES if max_bytes is None else max_bytes
+    # Cheap early rejection when the multipart part declared its size
+    if upload.size is not None and upload.size > max_bytes:
+        raise _file_too_large()
+    try:
+        return await run_in_threadpool(_hash_file, upload.file, max_bytes)
+    except _TooLarge:
+        raise _file_too_large()
+
+
+async def save_upload(upload: UploadFile, storage_key: str, content_type: str) -> StoredUpload:
+    """
+    Store an upload under its content hash, copying it in bounded chunks
+    in the thread pool. Nothing is written when an object with the same
+    content already exists.
+    """
+    filename = storage_filename(storage_key, content_type)
+    created = await run_in_threadpool(storage.upload_file, upload.file, filename, content_type)
+    return StoredUpload(storage_key, filename, storage.local_path(filename), created)
+
+
+async def save_uploads(uploads: List[UploadFile]) -> List[Optional[StoredUpload]]:
+    """
+    Save several uploads concurrently, deduplicated by content.
+
+    Every upload is hashed, and checked against the size limit and the
+    accepted image types, before any is written, so a 413 or 415 leaves
+    nothing behind. Returns None where storing failed.
+    """
+    storage_keys = await asyncio.gather(*[hash_upload(upload) for upload in uploads])
+    content_types = await asyncio.gather(*[upload_content_type(upload) for upload in uploads])
+    
+    # Identical files within the batch are written once
+    filenames = [
+        storage_filename(storage_key, content_type)
+        for storage_key, content_type in zip(storage_keys, content_types)
+    ]
+    first_upload = {}
+    for upload, storage_key, content_type, filename in zip(uploads, storage_keys, content_types, filenames):
+        first_upload.setdefault(filename, (upload, storage_key, content_type))
+    results = await asyncio.gather(
+        *[save_upload(*first) for first in first_upload.values()],
+        return_exceptions=True,
+    )
+    results_by_filename = dict(zip(first_upload, results))
+    
+    stored = []
+    for filename in filenames:
+        result = results_by_filename[filename]
+        if isinstance(result, BaseException):
+            print(f"Image save failed: {result}")
+            stored.append(None)
+        else:
+            stored.append(result)
+    return stored
+
+
+async def count_references(db: AsyncSession, storage_keys: Iterable[str]) -> Dict[str, int]:
+    """
+    Number of Image rows referencing each stored blob. A blob, and its
+    variants, may only be deleted once its count is zero.
+    """
+    storage_keys = set(storage_keys)
+    counts = dict.fromkeys(storage_keys, 0)
+    if storage_keys:
+        result = await db.execute(
+            select(Image.storage_key, func.count())
+            .where(Image.storage_key.in_(storage_keys))
+            .group_by(Image.storage_key)
+        )
+        counts.update(result.all())
+    return counts
+
+
+async def presign_upload(sha256: str, content_type: str, size: int) -> Dict[str, object]:
+    """
+    Issue an upload URL for an image the client sends straight to storage.
+
+    The key is the SHA-256 the client computed, so content that is already
+    stored needs no upload at all; it is touched instead, which keeps image
+    garbage collection away from it until the item referencing it is saved.
+    """
+    sha256 = sha256.lower()
+    if not _SHA256.match(sha256):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="sha256 must be 64 hex digits",
+        )
+    extension = CONTENT_TYPE_EXTENSIONS.get(content_type)
+    if extension is None:
+        raise _unsupported_type()
+    if size <= 0 or size > settings.MAX_UPLOAD_FILE_BYTES:
+        raise _file_too_large()
+    
+    key = f"{sha256}{extension}"
+    if await run_in_threadpool(storage.touch, key):
+        return {"key": key, "exists": True}
+    return {
+        "key": key,
+        "exists": False,
+        "expires_in": settings.UPLOAD_URL_EXPIRE_SECONDS,
+        **storage.presign_upload(key, content_type, size, sha256),
+    }
+
+
+async def receive_upload(chunks: AsyncIterator[bytes], key: str, size: int, content_type: Optional[str]) -> bool:
+    """
+    Store a body sent to a local upload URL, after checking it has the
+    length the URL was issued for and hashes to its key.
+    """
+    digest = hashlib.sha256()
+    received = 0
+    with tempfile.TemporaryFile() as buffer:
+        async for chunk in chunks:
+            received += len(chunk)
+            if received > size:
+                raise _file_too_large()
+            digest.update(chunk)
+            await run_in_threadpool(buffer.write, chunk)
+        if received != size or digest.hexdigest() != key.split(".")[0]:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Upload does not match the size and SHA-256 it was issued for",
+            )
+        return await run_in_threadpool(storage.upload_file, buffer, key, content_type)
+
+
+async def verify_uploaded_keys(keys: List[str]) -> List[str]:
+    """
+    Check that every key was issued by `presign_upload` and its upload has
+    arrived within the size limit; raises 400 or 413 otherwise.
+    """
+    for key in keys:
+        if not _UPLOADED_KEY.match(key):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid image key: {key}",
+            )
+    objects = await asyncio.gather(*[run_in_threadpool(storage.stat, key) for key in keys])
+    for key, stored in zip(keys, objects):
+        if stored is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Image {key} has not been uploaded",
+            )
+        if stored.size > settings.MAX_UPLOAD_FILE_BYTES:
+            raise _file_too_large()
+    return keys
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Benchmark the cache codecs and compression on a 100-item listing page.
+
+For every codec and compression setting, reports encode and decode time
+and the number of bytes stored in Redis. Codecs whose package is not
+installed are skipped. The last rows measure the pre-encoded response
+bodies that listing pages are cached as, which are only compressed.
+
+Run from the backend directory:
+    python benchmarks/cache_codecs.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cache_hit import build_page
+
+from app.api.cache import encode_response
+from app.schemas.schemas import ItemPage
+from app.services import codecs
+from app.services.codecs import Compressor, JsonCodec, MsgpackCodec, OrjsonCodec
+
+
+def measure(fn, rounds: int) -> float:
+    for _ in range(10):
+        fn()
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds
+
+
+def report(label: str, encode, decode, rounds: int) -> None:
+    stored = encode()
+    encode_time = measure(encode, rounds)
+    decode_time = measure(lambda: decode(stored), rounds)
+    print(f"{label:<24} {encode_time * 1e6:10.1f} {decode_time * 1e6:10.1f} {len(stored):10d}")
+
+
+def main():
+    rounds = int(os.getenv("ROUNDS", 500))
+    page = build_page()
+    
+    available = [JsonCodec()]
+    if codecs.orjson is not None:
+        available.append(OrjsonCodec())
+    if codecs.msgpack is not None:
+        available.append(MsgpackCodec())
+    compressions = ["none", "zlib"] + (["zstd"] if codecs.zstandard is not None else [])
+    
+    print(f"100-item page, {rounds} rounds")
+    print(f"{'codec + compression':<24} {'encode us':>10} {'decode us':>10} {'bytes':>10}")
+    for codec in available:
+        for algorithm in compressions:
+            compressor = Compressor(algorithm, min_bytes=1024)
+            report(
+                f"{codec.name} + {algorithm}",
+                lambda: compressor.compress(codec.encode(page)),
+                lambda data: codec.decode(compressor.decompress(data)),
+                rounds,
+            )
+    
+    body = encode_response(ItemPage, page)
+    for algorithm in compressions:
+        compressor = Compressor(algorithm, min_bytes=1024)
+        report(
+            f"response body + {algorithm}",
+            lambda: compressor.compress(body),
+            compressor.decompress,
+            rounds,
+        )
+
+
+if __name__ == "__main__":
+    main()
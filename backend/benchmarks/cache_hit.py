@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark the cost of serving a cached GET /api/items page.
+
+Compares the previous cache-hit path (decode JSON from Redis, validate
+against response_model, re-encode) with serving the pre-encoded bytes.
+
+Run from the backend directory:
+    python benchmarks/cache_hit.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.api.cache import encode_response, json_response
+from app.schemas.schemas import ItemPage
+
+
+def build_page(count: int = 100) -> dict:
+    """A realistic listing page: every item with two images and four tags."""
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    items = []
+    for i in range(count):
+        created_at = now - timedelta(minutes=i)
+        items.append({
+            'id': i + 1,
+            'title': f"Blue Denim Jacket #{i}",
+            'description': "Classic denim jacket in blue. Goes well with any outfit, slightly worn but in excellent condition.",
+            'category': "outerwear",
+            'type': "casual",
+            'size': "m",
+            'condition': "good",
+            'point_value': 150,
+            'user_id': 1,
+            'status': "available",
+            'is_approved': True,
+            'created_at': created_at,
+            'updated_at': created_at,
+            'images': [
+                {
+                    'id': i * 2 + n,
+                    'image_url': f"/static/images/{i:032x}.jpeg",
+                    'is_primary': n == 0,
+                    'item_id': i + 1,
+                    'created_at': created_at
+                }
+                for n in range(2)
+            ],
+            'tags': ["denim", "jacket", "casual", "blue"],
+            'user': None
+        })
+    return {"items": items, "total": 5000, "next_cursor": None}
+
+
+async def old_hit(raw: bytes, field) -> bytes:
+    # What a hit used to cost: decode, validate against response_model, encode
+    payload = json.loads(raw)
+    content = await serialize_response(field=field, response_content=payload)
+    return JSONResponse(content).body
+
+
+async def new_hit(raw: bytes, field) -> bytes:
+    return json_response(raw).body
+
+
+async def measure(label: str, fn, raw: bytes, field, rounds: int) -> float:
+    for _ in range(10):
+        await fn(raw, field)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        await fn(raw, field)
+    per_call = (time.perf_counter() - start) / rounds
+    print(f"{label:<28} {per_call * 1e6:10.1f} us/hit")
+    return per_call
+
+
+async def main():
+    rounds = int(os.getenv("ROUNDS", 500))
+    field = create_response_field(name="Response_get_items", type_=ItemPage)
+    page = build_page()
+    
+    legacy_raw = json.dumps(page, default=str).encode()
+    encoded_raw = encode_response(ItemPage, page)
+    print(f"100-item page: {len(encoded_raw)} bytes, {rounds} rounds")
+    
+    before = await measure("decode + validate + encode", old_hit, legacy_raw, field, rounds)
+    after = await measure("pre-encoded bytes", new_hit, encoded_raw, field, rounds)
+    print(f"speedup: {before / after:.0f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Reconcile stored image files with the images table.
+
+Reports stored files that no Image row references any more (orphans) and
+Image rows whose file is missing. With --delete, orphans untouched for the
+grace period are removed along with their variants. Deleting items queues
+the same collection for their files; this catches anything that missed it.
+"""
+
+import argparse
+import asyncio
+import time
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+from sqlalchemy import func, select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.models.models import Image
+from app.services.image_gc import is_idle, storage_key_of, stored_filename
+from app.services.s3 import StoredObject, storage
+from app.services.uploads import count_references
+
+def scan_storage() -> Tuple[Dict[str, List[StoredObject]], List[StoredObject]]:
+    """Group the stored files by storage key; also returns partial writes"""
+    files_by_key = defaultdict(list)
+    partial = []
+    for stored in storage.iter_objects():
+        if stored.key.endswith(".part"):
+            partial.append(stored)
+            continue
+        key = storage_key_of(stored.key)
+        if key is not None:
+            files_by_key[key].append(stored)
+    return files_by_key, partial
+
+def remove_if_idle(files: List[StoredObject], grace_seconds: float) -> int:
+    """Delete a group of files unless one was touched since the scan; returns the bytes freed"""
+    if not all(is_idle(f.key, grace_seconds) for f in files):
+        return 0
+    storage.delete([f.key for f in files])
+    return sum(f.size for f in files)
+
+async def find_orphans(
+    files_by_key: Dict[str, List[StoredObject]],
+    batch_size: int,
+    semaphore: asyncio.Semaphore,
+) -> List[str]:
+    """Storage keys with files on disk but no Image row, checked in parallel batches"""
+    keys = sorted(files_by_key)
+
+    async def check(batch: List[str]) -> List[str]:
+        async with semaphore, AsyncSessionLocal() as session:
+            references = await count_references(session, batch)
+        return [key for key in batch if not references[key]]
+
+    batches = await asyncio.gather(*[
+        check(keys[start:start + batch_size])
+        for start in range(0, len(keys), batch_size)
+    ])
+    return [key for batch in batches for key in batch]
+
+async def find_missing(
+    present: Set[str],
+    batch_size: int,
+    semaphore: asyncio.Semaphore,
+) -> List[Tuple[int, int, str]]:
+    """(image id, item id, url) of rows whose stored file is not on disk, scanned in parallel id ranges"""
+    async with AsyncSessionLocal() as session:
+        low, high = (await session.execute(select(func.min(Image.id), func.max(Image.id)))).one()
+    if low is None:
+        return []
+
+    async def check(start: int) -> List[Tuple[int, int, str]]:
+        async with semaphore, AsyncSessionLocal() as session:
+            result = await session.execute(
+                select(Image.id, Image.item_id, Image.image_url)
+                .where(Image.id >= start, Image.id < start + batch_size)
+            )
+            rows = result.all()
+        return [
+            (image_id, item_id, image_url)
+            for image_id, item_id, image_url in rows
+            if stored_filename(image_url) and stored_filename(image_url) not in present
+        ]
+
+    batches = await asyncio.gather(*[check(start) for start in range(low, high + 1, batch_size)])
+    return sorted(row for batch in batches for row in batch)
+
+async def gc_images(delete: bool, grace_seconds: float, batch_size: int, parallelism: int):
+    """Report, and optionally delete, orphaned image files"""
+    semaphore = asyncio.Semaphore(parallelism)
+    files_by_key, partial = await asyncio.to_thread(scan_storage)
+    print(f"Scanned {sum(len(files) for files in files_by_key.values())} files for {len(files_by_key)} images in {storage.name} storage")
+
+    orphan_keys, missing = await asyncio.gather(
+        find_orphans(files_by_key, batch_size, semaphore),
+        find_missing({f.key for files in files_by_key.values() for f in files}, batch_size, semaphore),
+    )
+
+    # Recently touched files may belong to an upload that is not committed yet
+    cutoff = time.time() - grace_seconds
+    orphans = {}
+    recent = 0
+    for key in orphan_keys:
+        if max(f.modified for f in files_by_key[key]) > cutoff:
+            recent += 1
+        else:
+            orphans[key] = files_by_key[key]
+    stale_partial = [f for f in partial if f.modified <= cutoff]
+
+    for key, files in orphans.items():
+        print(f"orphan {key}: {len(files)} files, {sum(f.size for f in files)} bytes")
+    for f in stale_partial:
+        print(f"partial write {f.key}: {f.size} bytes")
+    for image_id, item_id, image_url in missing:
+        print(f"missing file for image {image_id} (item {item_id}): {image_url}")
+
+    reclaimable = sum(f.size for files in orphans.values() for f in files) + sum(f.size for f in stale_partial)
+    print(f"{len(orphans)} orphaned images ({reclaimable} bytes), {recent} unreferenced but recently used, "
+          f"{len(stale_partial)} partial writes, {len(missing)} rows with missing files")
+
+    if not delete:
+        if orphans or stale_partial:
+            print("Run with --delete to remove orphaned files")
+        return
+
+    groups = list(orphans.values()) + [[f] for f in stale_partial]
+    freed = await asyncio.gather(*[asyncio.to_thread(remove_if_idle, files, grace_seconds) for files in groups])
+    print(f"Deleted {sum(1 for size in freed if size)} of {len(groups)} orphans, freed {sum(freed)} bytes")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--delete", action="store_true",
+                        help="remove orphaned files instead of only reporting them")
+    parser.add_argument("--grace-seconds", type=float, default=settings.IMAGE_GC_GRACE_SECONDS,
+                        help="keep unreferenced files touched more recently than this")
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="storage keys or image rows per query")
+    parser.add_argument("--parallelism", type=int, default=4,
+                        help="batches queried at the same time")
+    args = parser.parse_args()
+
+    engine.echo = False
+    asyncio.run(gc_images(args.delete, args.grace_seconds, args.batch_size, args.parallelism))
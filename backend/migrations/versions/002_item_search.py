@@ -0,0 +1,73 @@
+"""item full-text search
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    
+    if dialect == 'sqlite':
+        # External-content FTS5 table over items(title, description)
+        op.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS items_fts USING fts5(
+                title, description, content='items', content_rowid='id'
+            )
+        """)
+        
+        # Keep the index in sync with inserts, deletes and updates
+        op.execute("""
+            CREATE TRIGGER IF NOT EXISTS items_fts_ai AFTER INSERT ON items BEGIN
+                INSERT INTO items_fts(rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER IF NOT EXISTS items_fts_ad AFTER DELETE ON items BEGIN
+                INSERT INTO items_fts(items_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+            END
+        """)
+        op.execute("""
+            CREATE TRIGGER IF NOT EXISTS items_fts_au AFTER UPDATE OF title, description ON items BEGIN
+                INSERT INTO items_fts(items_fts, rowid, title, description)
+                VALUES ('delete', old.id, old.title, old.description);
+                INSERT INTO items_fts(rowid, title, description)
+                VALUES (new.id, new.title, new.description);
+            END
+        """)
+        
+        # Backfill existing rows
+        op.execute("INSERT INTO items_fts(items_fts) VALUES ('rebuild')")
+    
+    elif dialect == 'postgresql':
+        # Expression index; building it indexes every existing row
+        op.execute("""
+            CREATE INDEX IF NOT EXISTS ix_items_search ON items USING gin (
+                to_tsvector('english'::regconfig, coalesce(title, '') || ' ' || coalesce(description, ''))
+            )
+        """)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    
+    if dialect == 'sqlite':
+        op.execute("DROP TRIGGER IF EXISTS items_fts_au")
+        op.execute("DROP TRIGGER IF EXISTS items_fts_ad")
+        op.execute("DROP TRIGGER IF EXISTS items_fts_ai")
+        op.execute("DROP TABLE IF EXISTS items_fts")
+    
+    elif dialect == 'postgresql':
+        op.execute("DROP INDEX IF EXISTS ix_items_search")
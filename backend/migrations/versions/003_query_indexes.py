@@ -0,0 +1,72 @@
+"""composite indexes for browse, moderation and swap queries
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 11:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+# Predicates of the partial indexes; must match ITEM_IS_LISTED and
+# ITEM_IS_PENDING_APPROVAL in app/models/models.py
+LISTED = {
+    'postgresql_where': sa.text("is_approved = true AND status = 'available'"),
+    'sqlite_where': sa.text("is_approved = 1 AND status = 'available'"),
+}
+PENDING = {
+    'postgresql_where': sa.text("is_approved = false"),
+    'sqlite_where': sa.text("is_approved = 0"),
+}
+
+INDEXES = [
+    # GET /api/items, newest first, optionally filtered by one facet
+    ('ix_items_browse', 'items', ['created_at', 'id'], LISTED),
+    ('ix_items_browse_category', 'items', ['category', 'created_at', 'id'], LISTED),
+    ('ix_items_browse_condition', 'items', ['condition', 'created_at', 'id'], LISTED),
+    ('ix_items_browse_size', 'items', ['size', 'created_at', 'id'], LISTED),
+    # GET /api/admin/items/pending
+    ('ix_items_pending', 'items', ['created_at'], PENDING),
+    # GET /api/items/my-items and GET /api/users/{user_id}/items
+    ('ix_items_user_created', 'items', ['user_id', 'created_at'], {}),
+    # selectinload(Item.images) and tag lookups
+    ('ix_images_item_id', 'images', ['item_id'], {}),
+    ('ix_item_tag_tag_id', 'item_tag', ['tag_id'], {}),
+    # GET /api/swaps: requester_id OR provider_id, newest first
+    ('ix_swaps_requester_created', 'swaps', ['requester_id', 'created_at'], {}),
+    ('ix_swaps_provider_created', 'swaps', ['provider_id', 'created_at'], {}),
+]
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction on Postgres
+    with op.get_context().autocommit_block():
+        for name, table, columns, options in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                **options
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, options in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                if_exists=True,
+                postgresql_concurrently=True
+            )
@@ -0,0 +1,59 @@
+"""content-addressed image storage key
+
+Revision ID: 005
+Revises: 004
+Create Date: 2026-10-17 13:00:00.000000
+
+"""
+import os
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '005'
+down_revision = '004'
+branch_labels = None
+depends_on = None
+
+
+BATCH_SIZE = 1000
+
+
+def upgrade():
+    op.add_column('images', sa.Column('storage_key', sa.String(), nullable=True))
+    op.create_index('ix_images_storage_key', 'images', ['storage_key'])
+    
+    # Earlier uploads were named by uuid4 rather than by content; their file
+    # stem still identifies the file, so rows sharing a file share a key
+    images = sa.table(
+        'images',
+        sa.column('id', sa.Integer),
+        sa.column('image_url', sa.String),
+        sa.column('storage_key', sa.String),
+    )
+    bind = op.get_bind()
+    rows = bind.execute(
+        sa.select(images.c.id, images.c.image_url)
+        .where(images.c.image_url.like('/static/images/%'))
+        # The shared fallback image is not an upload
+        .where(images.c.image_url != '/static/images/placeholder.png')
+    ).all()
+    updates = [
+        {'image_id': image_id, 'storage_key': os.path.splitext(os.path.basename(image_url))[0]}
+        for image_id, image_url in rows
+    ]
+    for start in range(0, len(updates), BATCH_SIZE):
+        bind.execute(
+            images.update()
+            .where(images.c.id == sa.bindparam('image_id'))
+            .values(storage_key=sa.bindparam('storage_key')),
+            updates[start:start + BATCH_SIZE]
+        )
+
+
+def downgrade():
+    op.drop_index('ix_images_storage_key', table_name='images')
+    with op.batch_alter_table('images') as batch_op:
+        batch_op.drop_column('storage_key')
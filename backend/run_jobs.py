@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Run background jobs in a process of their own.
+
+Start the API with JOB_WORKERS=0 to leave all jobs to this command. Jobs
+that touch the cache need REDIS_URL set, since the in-memory fallback is
+private to each process.
+"""
+
+import argparse
+import asyncio
+
+from app.core.config import settings
+from app.services.images import shutdown_pool
+from app.services.jobs import JobWorker
+from app.services.redis import redis_service
+
+async def run_jobs(concurrency: int, once: bool):
+    """Run jobs until interrupted, or only the jobs due now with `once`"""
+    worker = JobWorker(concurrency=concurrency)
+    try:
+        if once:
+            count = await worker.drain()
+            print(f"Ran {count} jobs")
+            return
+
+        await redis_service.start()
+        await worker.start()
+        print(f"Worker {worker.worker_id} running {worker.concurrency} jobs at a time")
+        await asyncio.Event().wait()
+    finally:
+        await worker.stop()
+        await redis_service.close()
+        shutdown_pool()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=settings.JOB_WORKERS or 4,
+                        help="jobs run at the same time")
+    parser.add_argument("--once", action="store_true",
+                        help="run the jobs that are due, then exit")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(run_jobs(args.concurrency, args.once))
+    except KeyboardInterrupt:
+        pass
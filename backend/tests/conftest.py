@@ -1,16 +1,20 @@
 import pytest
-from fastapi.testclient import TestClient
+import pytest_asyncio
+from httpx import AsyncClient
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 import os
 import asyncio
-from typing import Any, Generator
+from typing import AsyncGenerator
 from dotenv import load_dotenv
 
 from app.main import app
 from app.core.database import get_db, Base
 from app.models.models import User, Item, Tag, Image, Swap
 from app.core.security import get_password_hash
+from app.services.memory_redis import MemoryRedis
+from app.services.redis import redis_service
+from app.services.tags import clear_tag_ids
 
 # Load test environment variables
 load_dotenv(".env.test", override=True)
@@ -29,13 +33,19 @@ def event_loop():
     yield loop
     loop.close()
 
-@pytest.fixture(scope="function")
+@pytest_asyncio.fixture(scope="function")
 async def db_session() -> AsyncSession:
     """Create a clean database for each test."""
+    # Start from an empty cache when no Redis server is configured
+    if isinstance(redis_service.redis_client, MemoryRedis):
+        await redis_service.redis_client.flushall()
+    
     # Create tables
     async with test_engine.begin() as conn:
         await conn.run_sync(Base.metadata.drop_all)
         await conn.run_sync(Base.metadata.create_all)
+    # Tag ids cached by an earlier test point at dropped rows
+    clear_tag_ids()
 
     # Create session
     async with TestingSessionLocal() as session:
@@ -44,8 +54,8 @@ async def db_session() -> AsyncSession:
         await session.rollback()
         await session.close()
 
-@pytest.fixture(scope="function")
-async def client(db_session: AsyncSession) -> Generator[TestClient, Any, None]:
+@pytest_asyncio.fixture(scope="function")
+async def client(db_session: AsyncSession) -> AsyncGenerator[AsyncClient, None]:
     """Create a FastAPI test client."""
     # Override get_db dependency
     async def override_get_db():
@@ -55,11 +65,11 @@ async def client(db_session: AsyncSession) -> Generator[TestClient, Any, None]:
             pass
 
     app.dependency_overrides[get_db] = override_get_db
-    with TestClient(app) as test_client:
+    async with AsyncClient(app=app, base_url="http://test") as test_client:
         yield test_client
     app.dependency_overrides.clear()
 
-@pytest.fixture(scope="function")
+@pytest_asyncio.fixture(scope="function")
 async def test_user(db_session: AsyncSession) -> User:
     """Create a test user."""
     user = User(
@@ -73,7 +83,7 @@ async def test_user(db_session: AsyncSession) -> User:
     await db_session.refresh(user)
     return user
 
-@pytest.fixture(scope="function")
+@pytest_asyncio.fixture(scope="function")
 async def test_admin(db_session: AsyncSession) -> User:
     """Create a test admin user."""
     admin = User(
@@ -87,7 +97,7 @@ async def test_admin(db_session: AsyncSession) -> User:
     await db_session.refresh(admin)
     return admin
 
-@pytest.fixture(scope="function")
+@pytest_asyncio.fixture(scope="function")
 async def test_item(db_session: AsyncSession, test_user: User) -> Item:
     """Create a test item."""
     item = Item(
@@ -0,0 +1,106 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from app.api.cache import CachedBody, get_or_build
+from app.services.codecs import Compressor, JsonCodec, OrjsonCodec
+from app.services.local_cache import LocalCache
+from app.services.memory_redis import MemoryRedis
+from app.services.redis import redis_service
+
+
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalCache(max_entries=2, max_bytes=1024, ttl=60)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    assert cache.get("a") == b"1"
+    cache.set("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_local_cache_bounds_bytes():
+    cache = LocalCache(max_entries=10, max_bytes=8, ttl=60)
+    cache.set("a", b"1234")
+    cache.set("b", b"5678")
+    cache.set("c", b"9")
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 5
+    cache.set("big", b"x" * 9)
+    assert cache.get("big") is None
+
+
+def test_local_cache_expires_entries():
+    cache = LocalCache(max_entries=10, max_bytes=1024, ttl=60)
+    cache.set("a", b"1", ttl=0)
+    assert cache.get("a") is None
+    cache.set("b", b"2")
+    cache.delete("b")
+    assert cache.get("b") is None
+
+
+@pytest.mark.asyncio
+async def test_get_or_build_coalesces_concurrent_misses():
+    builds = []
+
+    async def build(db):
+        builds.append(1)
+        await asyncio.sleep(0.01)
+        return CachedBody.build(b"[]")
+
+    entries = await asyncio.gather(*[get_or_build("test:single-flight", None, build) for _ in range(10)])
+    assert len(builds) == 1
+    assert {entry.body for entry in entries} == {b"[]"}
+
+
+@pytest.mark.parametrize("codec", [JsonCodec, OrjsonCodec])
+def test_codecs_encode_datetimes(codec):
+    if codec is OrjsonCodec:
+        pytest.importorskip("orjson")
+    value = {"id": 1, "created_at": datetime(2024, 1, 1, 12, 30)}
+    assert codec().decode(codec().encode(value)) == {"id": 1, "created_at": "2024-01-01T12:30:00"}
+
+
+def test_compressor_frames_values():
+    compressor = Compressor("zlib", min_bytes=16)
+    small, large = b"[]", b"[" + b"0," * 100 + b"0]"
+    assert compressor.decompress(compressor.compress(small)) == small
+    assert len(compressor.compress(large)) < len(large)
+    assert compressor.decompress(compressor.compress(large)) == large
+    # INCR counters and entries written before framing pass through
+    assert compressor.decompress(b"42") == b"42"
+
+
+@pytest.mark.asyncio
+async def test_memory_redis_evicts_only_expiring_keys():
+    client = MemoryRedis(max_entries=2, max_bytes=1024)
+    await client.incr("ns:item_lists")
+    for key in ("a", "b", "c"):
+        await client.set(key, b"value", ex=60)
+    assert await client.get("a") is None
+    assert await client.mget(["b", "c"]) == [b"value", b"value"]
+    assert await client.get("ns:item_lists") == b"1"
+    assert await client.set("b", b"other", px=1000, nx=True) is None
+
+    async with client.pipeline(transaction=False) as pipe:
+        pipe.incr("ns:item_lists")
+        pipe.set("d", b"value", ex=60)
+        await pipe.execute()
+    assert await client.get("ns:item_lists") == b"2"
+    # The NX lookup touched "b", so adding "d" evicted "c"
+    assert await client.delete("b", "c", "d") == 2
+
+
+@pytest.mark.asyncio
+async def test_release_lock_leaves_a_lock_taken_over_by_another_worker():
+    token = await redis_service.acquire_lock("test:release", 1000)
+    assert await redis_service.acquire_lock("test:release", 1000) is None
+    # The lock expired and another worker took it
+    await redis_service.redis_client.set("lock:test:release", "other", px=1000)
+
+    await redis_service.release_lock("test:release", token)
+    assert await redis_service.redis_client.get("lock:test:release") == b"other"
+    await redis_service.release_lock("test:release", "other")
+    assert await redis_service.redis_client.get("lock:test:release") is None
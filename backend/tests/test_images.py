@@ -0,0 +1,124 @@
+
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from PIL import Image as PILImage
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from starlette.datastructures import Headers
+
+from app.models.models import Image, Item
+from app.services import image_gc, images, uploads
+from app.services.s3 import storage
+
+
+def test_render_variants_resizes_and_strips_exif(tmp_path):
+    # A landscape photo whose EXIF says it was taken rotated by 90 degrees
+    exif = PILImage.Exif()
+    exif[0x0112] = 6
+    exif[0x010F] = "Camera"
+    source = tmp_path / "photo.jpg"
+    PILImage.new("RGB", (3000, 2000), (10, 120, 200)).save(source, "JPEG", exif=exif)
+    
+    variants = images._render_variants(str(source), "photo", str(tmp_path))
+    
+    assert set(variants) == set(images.VARIANTS)
+    for variant, spec in images.VARIANTS.items():
+        for fmt in images.FORMATS:
+            assert variants[variant][fmt] == images.variant_filename("photo", variant, fmt)
+            with PILImage.open(tmp_path / images.variant_filename("photo", variant, fmt)) as rendered:
+                # Rotated upright, scaled to the longest edge, metadata dropped
+                assert rendered.size[1] == spec["max_size"]
+                assert rendered.size[0] < rendered.size[1]
+                assert not dict(rendered.getexif())
+
+
+@pytest.mark.asyncio
+async def test_derive_variants_skips_unreadable_images_but_raises_storage_errors(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "directory", str(tmp_path))
+    (tmp_path / "notes.jpg").write_bytes(b"not an image")
+    
+    assert await images.derive_variants("notes.jpg") is None
+    # Cut off mid-stream
+    photo = io.BytesIO()
+    PILImage.effect_noise((200, 200), 50).convert("RGB").save(photo, "JPEG")
+    (tmp_path / "cut.jpg").write_bytes(photo.getvalue()[:500])
+    assert await images.derive_variants("cut.jpg") is None
+    
+    # Failures outside decoding reach the job, which retries them
+    def unavailable(key, path):
+        raise ConnectionError("storage unavailable")
+    monkeypatch.setattr(storage, "local_path", lambda key: None)
+    monkeypatch.setattr(storage, "download", unavailable)
+    with pytest.raises(ConnectionError):
+        await images.derive_variants("photo.jpg")
+
+
+@pytest.mark.asyncio
+async def test_save_uploads_deduplicates_by_content(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "directory", str(tmp_path))
+    # JPEG magic bytes; the stored name follows the content, not the client's filename
+    content = b"\xff\xd8\xff same photo"
+    
+    stored = await uploads.save_uploads([
+        UploadFile(io.BytesIO(content), filename="a.JPG"),
+        UploadFile(io.BytesIO(content), filename="b.jpeg"),
+        UploadFile(io.BytesIO(content), filename="c.png", headers=Headers({"content-type": "image/png"})),
+    ])
+    
+    storage_key = hashlib.sha256(content).hexdigest()
+    assert [upload.storage_key for upload in stored] == [storage_key] * 3
+    assert stored[0].filename == f"{storage_key}.jpg"
+    assert [path.name for path in tmp_path.iterdir()] == [f"{storage_key}.jpg"]
+    
+    stored = await uploads.save_uploads([UploadFile(io.BytesIO(content), filename="d.jpg")])
+    assert not stored[0].created
+    
+    # Neither the content nor the declared type is an accepted image
+    page = UploadFile(io.BytesIO(b"<html></html>"), filename="page.html", headers=Headers({"content-type": "text/html"}))
+    with pytest.raises(HTTPException) as error:
+        await uploads.save_uploads([page])
+    assert error.value.status_code == 415
+    assert [path.name for path in tmp_path.iterdir()] == [f"{storage_key}.jpg"]
+
+
+def test_storage_key_of_groups_variants_with_their_original():
+    key = "ab" * 32
+    assert image_gc.storage_key_of(f"{key}.jpg") == key
+    assert image_gc.storage_key_of(images.variant_filename(key, "card", "webp")) == key
+    assert image_gc.storage_key_of(f"{key}.svg.gz") == key
+    assert image_gc.storage_key_of("placeholder.png") is None
+    assert image_gc.storage_key_of(f"{key}.jpg.0123.part") is None
+
+
+@pytest.mark.asyncio
+async def test_collect_image_files_keeps_referenced_and_recent_blobs(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "directory", str(tmp_path))
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'gc.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Item.__table__.create)
+        await conn.run_sync(Image.__table__.create)
+    
+    shared, orphan, recent = "a" * 64, "b" * 64, "c" * 64
+    for key in (shared, orphan, recent):
+        for filename in image_gc.blob_filenames(f"{key}.jpg"):
+            (tmp_path / filename).write_bytes(b"x")
+    # Only the recently uploaded blob has a fresh mtime
+    for key in (shared, orphan):
+        for filename in image_gc.blob_filenames(f"{key}.jpg"):
+            os.utime(tmp_path / filename, (0, 0))
+    
+    async with AsyncSession(engine) as session:
+        session.add(Image(image_url=f"/static/images/{shared}.jpg", storage_key=shared, item_id=1))
+        await session.commit()
+        removed = await image_gc.collect_image_files(
+            session, [f"{key}.jpg" for key in (shared, orphan, recent)] + ["placeholder.png"], grace_seconds=60
+        )
+    await engine.dispose()
+    
+    assert removed == [f"{orphan}.jpg"]
+    remaining = {path.name for path in tmp_path.iterdir()}
+    assert not any(name.startswith(orphan) for name in remaining)
+    assert f"{shared}.jpg" in remaining and f"{recent}.jpg" in remaining
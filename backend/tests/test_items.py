@@ -2,16 +2,14 @@ import pytest
 from fastapi import status
 
 @pytest.mark.asyncio
-async def test_create_item(client, test_user):
-    """Test item creation."""
+async def test_create_item(client, test_user, tmp_path, monkeypatch):
+    """Test item creation with multipart image uploads."""
     # Create token for authentication
+    import json
     from app.core.security import create_user_token
+    from app.services.s3 import storage
     token = create_user_token(user_id=test_user.id, username=test_user.username, role=test_user.role)
-    
-    # Mock file upload
-    import io
-    from fastapi import UploadFile
-    test_file = io.BytesIO(b"file content")
+    monkeypatch.setattr(storage, "directory", str(tmp_path))
     
     # Create item data
     item_data = {
@@ -25,29 +23,82 @@ async def test_create_item(client, test_user):
         "tags": ["jeans", "denim"]
     }
     
-    # This test would normally involve file uploads, but for simplicity in testing,
-    # we're going to mock it by patching the s3_service.upload_file method
-    import unittest.mock
-    from app.services.s3 import s3_service
-    
-    with unittest.mock.patch.object(s3_service, "upload_file", return_value="https://example.com/test-image.jpg"):
-        files = {
-            "images": ("test.jpg", test_file, "image/jpeg")
-        }
-        response = await client.post(
-            "/api/items",
-            files=files,
-            data={"item_in": str(item_data)},
-            headers={"Authorization": f"Bearer {token}"}
-        )
+    files = [
+        ("images", ("front.jpg", b"front photo", "image/jpeg")),
+        ("images", ("back.jpg", b"back photo", "image/jpeg")),
+    ]
+    response = await client.post(
+        "/api/items",
+        files=files,
+        data={"item_in": json.dumps(item_data)},
+        headers={"Authorization": f"Bearer {token}"}
+    )
     
     assert response.status_code == 200
     data = response.json()
     assert data["title"] == "New Item"
     assert data["description"] == "A brand new item"
     assert data["user_id"] == test_user.id
-    assert data["status"] == "pending"
-    assert not data["is_approved"]
+    # Items are auto-approved for development
+    assert data["status"] == "available"
+    assert data["is_approved"]
+    assert len(data["images"]) == 2
+    assert [image["is_primary"] for image in data["images"]] == [True, False]
+    assert len(list(tmp_path.iterdir())) == 2
+    
+    # A single file is accepted too
+    response = await client.post(
+        "/api/items",
+        files=files[:1],
+        data={"item_in": json.dumps(item_data)},
+        headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 200
+    assert len(response.json()["images"]) == 1
+
+@pytest.mark.asyncio
+async def test_create_item_from_uploaded_keys(client, test_user, tmp_path, monkeypatch):
+    """Test item creation from images uploaded through POST /api/uploads."""
+    import hashlib
+    import json
+    from app.core.security import create_user_token
+    from app.services.s3 import storage
+    token = create_user_token(user_id=test_user.id, username=test_user.username, role=test_user.role)
+    headers = {"Authorization": f"Bearer {token}"}
+    monkeypatch.setattr(storage, "directory", str(tmp_path))
+    
+    content = b"direct photo"
+    response = await client.post("/api/uploads", headers=headers, json={
+        "sha256": hashlib.sha256(content).hexdigest(),
+        "content_type": "image/jpeg",
+        "size": len(content),
+    })
+    assert response.status_code == 200
+    ticket = response.json()
+    assert not ticket["exists"]
+    response = await client.request(ticket["method"], ticket["url"], content=content, headers=ticket["headers"])
+    assert response.status_code == 204
+    
+    item_data = {
+        "title": "Direct Item",
+        "description": "Images uploaded beforehand",
+        "category": "Clothing",
+        "type": "Pants",
+        "size": "L",
+        "condition": "good",
+        "point_value": 50,
+        "tags": [],
+        "image_keys": [ticket["key"]]
+    }
+    response = await client.post("/api/items", data={"item_in": json.dumps(item_data)}, headers=headers)
+    
+    assert response.status_code == 200
+    assert [image["image_url"] for image in response.json()["images"]] == [storage.url(ticket["key"])]
+    
+    # Neither files nor keys
+    item_data["image_keys"] = []
+    response = await client.post("/api/items", data={"item_in": json.dumps(item_data)}, headers=headers)
+    assert response.status_code == 400
 
 @pytest.mark.asyncio
 async def test_get_items(client, test_item):
@@ -56,10 +107,10 @@ async def test_get_items(client, test_item):
     
     assert response.status_code == 200
     data = response.json()
-    assert isinstance(data, list)
-    assert len(data) > 0
-    assert data[0]["id"] == test_item.id
-    assert data[0]["title"] == test_item.title
+    assert isinstance(data["items"], list)
+    assert len(data["items"]) > 0
+    assert data["items"][0]["id"] == test_item.id
+    assert data["items"][0]["title"] == test_item.title
 
 @pytest.mark.asyncio
 async def test_get_item_detail(client, test_item):
@@ -107,8 +158,224 @@ async def test_delete_item(client, test_user, test_item):
         headers={"Authorization": f"Bearer {token}"}
     )
     
-    assert response.status_code == 200
+    assert response.status_code == 204
     
     # Verify item is deleted
     response = await client.get(f"/api/items/{test_item.id}")
     assert response.status_code == 404
+
+@pytest.mark.asyncio
+async def test_get_items_cursor_pagination(client, db_session, test_user):
+    """Test walking the item list with keyset cursors."""
+    from app.models.models import Item
+    for i in range(5):
+        db_session.add(Item(
+            title=f"Item {i}",
+            description="Paged item",
+            category="Clothing",
+            type="Shirt",
+            size="M",
+            condition="good",
+            point_value=10,
+            user_id=test_user.id,
+            status="available",
+            is_approved=True
+        ))
+    await db_session.commit()
+    
+    seen_ids = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get("/api/items", params=params)
+        assert response.status_code == 200
+        data = response.json()
+        seen_ids.extend(item["id"] for item in data["items"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+    
+    assert len(seen_ids) == 5
+    assert len(set(seen_ids)) == 5
+    assert seen_ids == sorted(seen_ids, reverse=True)
+
+@pytest.mark.asyncio
+async def test_get_items_invalid_cursor(client):
+    """Test that a malformed cursor is rejected."""
+    response = await client.get("/api/items", params={"cursor": "not-a-cursor"})
+    
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_search_items(client, db_session, test_user, test_item):
+    """Test full-text search over title and description."""
+    from app.models.models import Item
+    db_session.add(Item(
+        title="Blue Denim Jacket",
+        description="Classic jacket",
+        category="Clothing",
+        type="Jacket",
+        size="L",
+        condition="good",
+        point_value=50,
+        user_id=test_user.id,
+        status="available",
+        is_approved=True
+    ))
+    await db_session.commit()
+    
+    response = await client.get("/api/items", params={"search": "denim"})
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 1
+    assert data["items"][0]["title"] == "Blue Denim Jacket"
+    
+    # Prefix matches
+    response = await client.get("/api/items", params={"search": "jack"})
+    assert response.json()["total"] == 1
+    
+    # A search without any word matches nothing rather than everything
+    response = await client.get("/api/items", params={"search": "!!!"})
+    assert response.json()["total"] == 0
+    assert response.json()["items"] == []
+    response = await client.get("/api/items/facets", params={"search": "!!!"})
+    assert response.json()["total"] == 0
+
+@pytest.mark.asyncio
+async def test_search_items_cursor_pagination(client, db_session, test_user):
+    """Test that search results page with cursors when sorted by newest."""
+    from app.models.models import Item
+    for i in range(3):
+        db_session.add(Item(
+            title=f"Denim Jacket {i}",
+            description="Classic jacket",
+            category="Clothing",
+            type="Jacket",
+            size="L",
+            condition="good",
+            point_value=50,
+            user_id=test_user.id,
+            status="available",
+            is_approved=True
+        ))
+    await db_session.commit()
+    
+    # Relevance-ordered pages only support offsets
+    response = await client.get("/api/items", params={"search": "denim", "limit": 1})
+    assert response.status_code == 200
+    assert response.json()["next_cursor"] is None
+    
+    seen_ids = []
+    params = {"search": "denim", "limit": 2, "sort": "newest"}
+    while True:
+        response = await client.get("/api/items", params=params)
+        assert response.status_code == 200
+        data = response.json()
+        seen_ids.extend(item["id"] for item in data["items"])
+        if not data["next_cursor"]:
+            break
+        params["cursor"] = data["next_cursor"]
+    
+    assert len(seen_ids) == 3
+    assert seen_ids == sorted(seen_ids, reverse=True)
+    
+    response = await client.get("/api/items", params={"search": "denim", "sort": "price"})
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_get_item_facets(client, test_item):
+    """Test facet counts for the browse sidebar."""
+    response = await client.get("/api/items/facets")
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 1
+    assert data["facets"]["category"] == {test_item.category: 1}
+    assert data["facets"]["size"] == {test_item.size: 1}
+    
+    response = await client.get("/api/items/facets", params={"category": "Missing"})
+    assert response.json()["total"] == 0
+
+@pytest.mark.asyncio
+async def test_get_item_conditional(client, test_item):
+    """Test that an unchanged item is answered with 304 Not Modified."""
+    response = await client.get(f"/api/items/{test_item.id}")
+    
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    
+    response = await client.get(f"/api/items/{test_item.id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    
+    response = await client.get(f"/api/items/{test_item.id}", headers={"If-None-Match": '"stale"'})
+    assert response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_get_items_batch(client, test_item):
+    """Test fetching several items at once, skipping unknown IDs."""
+    response = await client.get(f"/api/items/batch?ids={test_item.id},999999,{test_item.id}")
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert [item["id"] for item in data] == [test_item.id]
+    
+    # Served from the cache the second time
+    response = await client.get(f"/api/items/batch?ids={test_item.id}")
+    assert response.status_code == 200
+    assert response.json()[0]["title"] == test_item.title
+    
+    response = await client.get("/api/items/batch?ids=1,abc")
+    assert response.status_code == 400
+
+@pytest.mark.asyncio
+async def test_create_item_rejects_oversized_image(client, test_user):
+    """Test that images over the per-file limit are refused with 413."""
+    import json
+    import unittest.mock
+    from app.core.config import settings
+    from app.core.security import create_user_token
+    token = create_user_token(user_id=test_user.id, username=test_user.username, role=test_user.role)
+    
+    item_data = {
+        "title": "Big Photo",
+        "description": "An item with an oversized image",
+        "category": "Clothing",
+        "type": "Pants",
+        "size": "L",
+        "condition": "like_new",
+        "point_value": 150,
+        "tags": []
+    }
+    
+    with unittest.mock.patch.object(settings, "MAX_UPLOAD_FILE_BYTES", 8):
+        response = await client.post(
+            "/api/items",
+            files={"images": ("big.jpg", b"x" * 64, "image/jpeg")},
+            data={"item_in": json.dumps(item_data)},
+            headers={"Authorization": f"Bearer {token}"}
+        )
+    
+    assert response.status_code == status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+
+@pytest.mark.asyncio
+async def test_resolve_tag_ids_after_tags_are_deleted(db_session):
+    """Test that clearing the tag id cache drops ids of deleted tags."""
+    from sqlalchemy import delete, select
+    from app.models.models import Tag
+    from app.services.tags import clear_tag_ids, resolve_tag_ids
+    
+    await db_session.execute(Tag.__table__.insert().values(name="knit"))
+    first = await resolve_tag_ids(db_session, ["knit"])
+    assert (await resolve_tag_ids(db_session, ["knit"])) == first
+    
+    await db_session.execute(delete(Tag))
+    await db_session.execute(Tag.__table__.insert().values(name="wool"))
+    clear_tag_ids()
+    tag_ids = await resolve_tag_ids(db_session, ["knit"])
+    
+    result = await db_session.execute(select(Tag.id).where(Tag.name == "knit"))
+    assert tag_ids == {"knit": result.scalar_one()}
@@ -0,0 +1,94 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.api.jobs import DERIVE_ITEM_VARIANTS
+from app.models.models import Image, Item, Job
+from app.services import jobs
+from app.services.s3 import storage
+
+
+@pytest_asyncio.fixture
+async def session_factory(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'jobs.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Job.__table__.create)
+        await conn.run_sync(Item.__table__.create)
+        await conn.run_sync(Image.__table__.create)
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_jobs_run_only_after_their_transaction_commits(session_factory, monkeypatch):
+    seen = []
+
+    async def handler(db, payload):
+        seen.append(payload["n"])
+
+    monkeypatch.setitem(jobs._handlers, "test.record", handler)
+    worker = jobs.JobWorker(session_factory, concurrency=2)
+
+    async with session_factory() as session:
+        jobs.enqueue(session, "test.record", {"n": 1})
+        await session.rollback()
+    async with session_factory() as session:
+        for n in (2, 3, 4):
+            jobs.enqueue(session, "test.record", {"n": n})
+        await session.commit()
+
+    assert await worker.drain() == 3
+    assert sorted(seen) == [2, 3, 4]
+    async with session_factory() as session:
+        # Finished jobs are removed
+        assert (await session.execute(select(Job))).all() == []
+
+
+@pytest.mark.asyncio
+async def test_failed_jobs_back_off_then_fail(session_factory, monkeypatch):
+    async def handler(db, payload):
+        raise RuntimeError("boom")
+
+    monkeypatch.setitem(jobs._handlers, "test.fail", handler)
+    worker = jobs.JobWorker(session_factory)
+
+    async with session_factory() as session:
+        job = jobs.enqueue(session, "test.fail", {}, max_attempts=2)
+        await session.commit()
+
+    assert await worker.drain() == 1
+    async with session_factory() as session:
+        job = await session.get(Job, job.id)
+        assert (job.status, job.attempts, job.last_error) == ("queued", 1, "RuntimeError: boom")
+        # Not due again until the backoff has passed
+        assert await jobs.claim_jobs(session, "other", 10) == []
+
+        job.run_at = jobs._now()
+        await session.commit()
+
+    assert await worker.drain() == 1
+    async with session_factory() as session:
+        job = await session.get(Job, job.id)
+        assert (job.status, job.attempts) == ("failed", 2)
+
+
+@pytest.mark.asyncio
+async def test_variant_job_retries_when_the_source_is_missing(session_factory, tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "directory", str(tmp_path))
+    worker = jobs.JobWorker(session_factory)
+
+    key = "d" * 64
+    async with session_factory() as session:
+        session.add(Image(image_url=storage.url(f"{key}.jpg"), storage_key=key, item_id=1))
+        job = jobs.enqueue(session, DERIVE_ITEM_VARIANTS, {"item_id": 1})
+        await session.commit()
+
+    assert await worker.drain() == 1
+    async with session_factory() as session:
+        job = await session.get(Job, job.id)
+        # An I/O error is not an unreadable image; the job is kept for a retry
+        assert job.status == "queued"
+        assert job.attempts == 1
+        assert job.last_error.startswith("FileNotFoundError")
@@ -0,0 +1,81 @@
+import gzip
+
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.testclient import TestClient
+
+from app.core.static_files import IMMUTABLE_CACHE_CONTROL, REVALIDATE_CACHE_CONTROL, ImageStaticFiles
+from app.services.images import variant_filename
+
+STEM = "ab" * 32
+
+
+def _client(directory) -> TestClient:
+    app = Starlette(routes=[Mount("/static/images", ImageStaticFiles(directory=str(directory)))])
+    return TestClient(app)
+
+
+def test_content_named_files_are_immutable_and_support_ranges(tmp_path):
+    (tmp_path / f"{STEM}.jpg").write_bytes(bytes(range(256)))
+    (tmp_path / "placeholder.png").write_bytes(b"png")
+    client = _client(tmp_path)
+
+    response = client.get(f"/static/images/{STEM}.jpg")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+    assert response.headers["accept-ranges"] == "bytes"
+    assert client.get("/static/images/placeholder.png").headers["cache-control"] == REVALIDATE_CACHE_CONTROL
+
+    partial = client.get(f"/static/images/{STEM}.jpg", headers={"Range": "bytes=10-19"})
+    assert partial.status_code == 206
+    assert partial.content == bytes(range(10, 20))
+    assert partial.headers["content-range"] == "bytes 10-19/256"
+
+    suffix = client.get(f"/static/images/{STEM}.jpg", headers={"Range": "bytes=-6"})
+    assert suffix.content == bytes(range(250, 256))
+
+    # A stale If-Range gets the whole file instead of a slice
+    stale = client.get(f"/static/images/{STEM}.jpg", headers={"Range": "bytes=0-9", "If-Range": "old"})
+    assert stale.status_code == 200
+    assert len(stale.content) == 256
+
+    unsatisfiable = client.get(f"/static/images/{STEM}.jpg", headers={"Range": "bytes=500-"})
+    assert unsatisfiable.status_code == 416
+    assert unsatisfiable.headers["content-range"] == "bytes */256"
+
+    not_modified = client.get(f"/static/images/{STEM}.jpg", headers={"If-None-Match": response.headers["etag"]})
+    assert not_modified.status_code == 304
+    assert not_modified.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+
+
+def test_variants_and_precompressed_siblings(tmp_path):
+    (tmp_path / f"{STEM}.jpg").write_bytes(b"original")
+    (tmp_path / variant_filename(STEM, "card", "webp")).write_bytes(b"card webp")
+    (tmp_path / variant_filename(STEM, "card", "jpeg")).write_bytes(b"card jpeg")
+    (tmp_path / "logo.svg").write_bytes(b"<svg/>")
+    (tmp_path / "logo.svg.gz").write_bytes(gzip.compress(b"<svg/>"))
+    client = _client(tmp_path)
+
+    webp = client.get(f"/static/images/{STEM}.jpg?variant=card", headers={"Accept": "image/webp,*/*"})
+    assert webp.content == b"card webp"
+    assert webp.headers["content-type"] == "image/webp"
+    assert "Accept" in webp.headers["vary"]
+
+    jpeg = client.get(f"/static/images/{STEM}.jpg?variant=card", headers={"Accept": "image/*"})
+    assert jpeg.content == b"card jpeg"
+
+    # Variants that have not been rendered yet fall back to the original
+    detail = client.get(f"/static/images/{STEM}.jpg?variant=detail", headers={"Accept": "image/webp"})
+    assert detail.content == b"original"
+    # ... and must not be cached as the variant
+    assert detail.headers["cache-control"] == REVALIDATE_CACHE_CONTROL
+    assert webp.headers["cache-control"] == IMMUTABLE_CACHE_CONTROL
+
+    svg = client.get("/static/images/logo.svg", headers={"Accept-Encoding": "gzip"})
+    assert svg.headers["content-encoding"] == "gzip"
+    assert svg.headers["content-type"].startswith("image/svg+xml")
+    assert svg.content == b"<svg/>"
+
+    plain = client.get("/static/images/logo.svg", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers
+    assert plain.content == b"<svg/>"
@@ -0,0 +1,60 @@
+import hashlib
+
+import pytest
+from fastapi import HTTPException
+
+from app.services import uploads
+from app.services.s3 import LocalStorage, S3Storage
+
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+
+@pytest.mark.asyncio
+async def test_local_presigned_upload_round_trip(tmp_path, monkeypatch):
+    local = LocalStorage(directory=str(tmp_path))
+    monkeypatch.setattr(uploads, "storage", local)
+    content = b"photo bytes"
+    sha256 = hashlib.sha256(content).hexdigest()
+
+    ticket = await uploads.presign_upload(sha256, "image/jpeg", len(content))
+    key = ticket["key"]
+    assert key == f"{sha256}.jpg" and not ticket["exists"]
+    token = ticket["url"].split("token=")[1]
+    assert local.verify_upload_token(token, key) == len(content)
+    assert local.verify_upload_token(token, "other.jpg") is None
+
+    # A body that does not hash to the key is refused
+    with pytest.raises(HTTPException) as error:
+        await uploads.receive_upload(_chunks(b"photo", b" bytez"), key, len(content), "image/jpeg")
+    assert error.value.status_code == 400
+    with pytest.raises(HTTPException):
+        await uploads.verify_uploaded_keys([key])
+
+    assert await uploads.receive_upload(_chunks(b"photo", b" bytes"), key, len(content), "image/jpeg")
+    assert (tmp_path / key).read_bytes() == content
+    assert await uploads.verify_uploaded_keys([key]) == [key]
+
+    # Known content needs no second upload
+    ticket = await uploads.presign_upload(sha256, "image/jpeg", len(content))
+    assert ticket == {"key": key, "exists": True}
+
+
+def test_s3_presigned_upload_pins_length_and_checksum(monkeypatch):
+    # Presigning is local; no request reaches S3
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "test")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "test")
+    s3 = S3Storage("bucket", region="us-east-1")
+    sha256 = hashlib.sha256(b"photo").hexdigest()
+
+    ticket = s3.presign_upload(f"{sha256}.png", "image/png", 5, sha256)
+
+    assert ticket["method"] == "PUT"
+    signed_headers = ticket["url"].split("X-Amz-SignedHeaders=")[1].split("&")[0].split("%3B")
+    for header in ("content-length", "content-type", "x-amz-checksum-sha256"):
+        assert header in signed_headers
+    assert ticket["headers"]["Content-Length"] == "5"
+    assert s3.key_from_url(s3.url(f"{sha256}.png")) == f"{sha256}.png"
+    assert s3.key_from_url("/static/images/placeholder.png") is None
@@ -0,0 +1,38 @@
+import pytest
+from fastapi import status
+
+from app.core.security import create_user_token, get_password_hash
+from app.models.models import Swap, User
+
+@pytest.mark.asyncio
+async def test_get_swap_cached_is_private(client, db_session, test_user, test_admin, test_item):
+    """Test that a cached swap is only served to its participants."""
+    outsider = User(
+        email="outsider@example.com",
+        username="outsider",
+        password=get_password_hash("password123"),
+        role="user"
+    )
+    swap = Swap(
+        requester_id=test_admin.id,
+        provider_id=test_user.id,
+        provider_item_id=test_item.id,
+        points_used=test_item.point_value,
+        status="requested"
+    )
+    db_session.add_all([outsider, swap])
+    await db_session.commit()
+
+    def auth(user):
+        token = create_user_token(user_id=user.id, username=user.username, role=user.role)
+        return {"Authorization": f"Bearer {token}"}
+
+    # The first read by a participant caches the swap
+    response = await client.get(f"/api/swaps/{swap.id}", headers=auth(test_user))
+    assert response.status_code == 200
+    response = await client.get(f"/api/swaps/{swap.id}", headers=auth(test_admin))
+    assert response.status_code == 200
+    assert response.json()["provider_item_id"] == test_item.id
+
+    response = await client.get(f"/api/swaps/{swap.id}", headers=auth(outsider))
+    assert response.status_code == status.HTTP_403_FORBIDDEN